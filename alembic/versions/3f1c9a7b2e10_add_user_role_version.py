@@ -0,0 +1,28 @@
+"""add user role_version
+
+Revision ID: 3f1c9a7b2e10
+Revises: d2248cf3a2ac
+Create Date: 2026-10-16 09:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7b2e10'
+down_revision: Union[str, Sequence[str], None] = 'd2248cf3a2ac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('role_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'role_version')
@@ -0,0 +1,55 @@
+"""add role permission_mask
+
+Revision ID: 7b4e2d91c5a3
+Revises: 3f1c9a7b2e10
+Create Date: 2026-10-16 11:40:07.918442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b4e2d91c5a3'
+down_revision: Union[str, Sequence[str], None] = '3f1c9a7b2e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Snapshot of app.core.permissions.PERMISSION_BITS at the time of this migration.
+PERMISSION_BITS = {
+    "rbac:manage": 0,
+    "users:read": 1,
+    "users:manage": 2,
+    "reports:view": 3,
+    "payments:create": 4,
+}
+
+roles = sa.table(
+    'roles',
+    sa.column('id', sa.Integer),
+    sa.column('permissions', sa.JSON),
+    sa.column('permission_mask', sa.BigInteger),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('roles', sa.Column('permission_mask', sa.BigInteger(), server_default='0', nullable=False))
+
+    # Compile the existing JSON permission lists into masks.
+    connection = op.get_bind()
+    for role_id, permissions in connection.execute(sa.select(roles.c.id, roles.c.permissions)).all():
+        mask = 0
+        for permission in permissions or []:
+            if permission in PERMISSION_BITS:
+                mask |= 1 << PERMISSION_BITS[permission]
+        connection.execute(
+            roles.update().where(roles.c.id == role_id).values(permission_mask=mask)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('roles', 'permission_mask')
@@ -0,0 +1,46 @@
+"""add payment summaries and payment query indexes
+
+Revision ID: 9d3b6f0e2a48
+Revises: 5a2e8c4f1d07
+Create Date: 2026-10-16 18:47:30.291644
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3b6f0e2a48'
+down_revision: Union[str, Sequence[str], None] = '5a2e8c4f1d07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # user_id and created_at are served by the leading columns of the keyset indexes.
+    op.create_index('ix_payments_status', 'payments', ['status'], unique=False)
+    op.create_index('ix_payments_provider_order_id', 'payments', ['provider_order_id'], unique=False)
+    op.create_table('payment_summaries',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'status', 'currency')
+    )
+    # Backfill from existing payments; from here on the app keeps them in step.
+    op.execute(
+        "INSERT INTO payment_summaries (user_id, status, currency, count, total_amount) "
+        "SELECT user_id, status, currency, COUNT(*), SUM(amount) FROM payments "
+        "GROUP BY user_id, status, currency"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('payment_summaries')
+    op.drop_index('ix_payments_provider_order_id', table_name='payments')
+    op.drop_index('ix_payments_status', table_name='payments')
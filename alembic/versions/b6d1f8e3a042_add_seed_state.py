@@ -0,0 +1,33 @@
+"""add seed_state
+
+Revision ID: b6d1f8e3a042
+Revises: e4a7c2d9b815
+Create Date: 2026-10-16 23:58:40.114702
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d1f8e3a042'
+down_revision: Union[str, Sequence[str], None] = 'e4a7c2d9b815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('seed_state',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('applied_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('seed_state')
@@ -0,0 +1,31 @@
+"""add payment keyset pagination indexes
+
+Revision ID: c81d5f3a9e27
+Revises: 7b4e2d91c5a3
+Create Date: 2026-10-16 14:05:52.660731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81d5f3a9e27'
+down_revision: Union[str, Sequence[str], None] = '7b4e2d91c5a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # users and roles are paginated by their primary key, which is already indexed.
+    op.create_index('ix_payments_user_id_created_at_id', 'payments', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_payments_created_at_id', 'payments', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_payments_created_at_id', table_name='payments')
+    op.drop_index('ix_payments_user_id_created_at_id', table_name='payments')
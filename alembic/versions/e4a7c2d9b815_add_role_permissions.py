@@ -0,0 +1,57 @@
+"""add normalized role_permissions and a role_id index on user_role_association
+
+Revision ID: e4a7c2d9b815
+Revises: 9d3b6f0e2a48
+Create Date: 2026-10-16 23:41:12.508317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7c2d9b815'
+down_revision: Union[str, Sequence[str], None] = '9d3b6f0e2a48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+roles = sa.table(
+    'roles',
+    sa.column('id', sa.Integer),
+    sa.column('permissions', sa.JSON),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_user_role_association_role_id_user_id', 'user_role_association', ['role_id', 'user_id'], unique=False
+    )
+    role_permissions = op.create_table('role_permissions',
+    sa.Column('role_id', sa.Integer(), nullable=False),
+    sa.Column('permission', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['role_id'], ['roles.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('role_id', 'permission')
+    )
+    op.create_index(
+        'ix_role_permissions_permission_role_id', 'role_permissions', ['permission', 'role_id'], unique=False
+    )
+
+    # Copy the existing JSON permission lists; from here on the app keeps them in step.
+    connection = op.get_bind()
+    rows = [
+        {'role_id': role_id, 'permission': permission}
+        for role_id, permissions in connection.execute(sa.select(roles.c.id, roles.c.permissions)).all()
+        for permission in dict.fromkeys(permissions or [])
+    ]
+    if rows:
+        op.bulk_insert(role_permissions, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_role_permissions_permission_role_id', table_name='role_permissions')
+    op.drop_table('role_permissions')
+    op.drop_index('ix_user_role_association_role_id_user_id', table_name='user_role_association')
@@ -1,29 +1,141 @@
+from dataclasses import dataclass
+
 from fastapi import Depends, HTTPException, status, Request
-from loguru import logger
-from typing import Optional
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.routing import BaseRoute
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from app.auth.auth import fastapi_users
-from app.models.user import User
+from app.auth.auth import bearer_transport, fastapi_users, read_token_claims
 from app.core import permissions as perms
+from app.core.cache import auth_state_cache, permission_cache
+from app.core.logging import throttled_logger
+from app.crud.crud_user import crud_user
+from app.db.session import get_db, read_session, set_session_user
 
 current_active_user = fastapi_users.current_user(active=True)
 
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller as seen by the permission dependencies."""
+    id: int
+    email: str
+    permission_mask: int
+
+    def has_permission(self, permission: str) -> bool:
+        bit = perms.permission_bit(permission)
+        return bit is not None and self.permission_mask & bit == bit
+
+    @property
+    def permissions(self) -> frozenset[str]:
+        return perms.mask_to_permissions(self.permission_mask)
+
+
+async def _load_permission_mask(db: AsyncSession, user_id: int) -> Tuple[Optional[Row], int]:
+    # Entries carry the role_version they were built at: a grant change made
+    # through another worker bumps it, which turns the entry into a miss.
+    state, permission_mask = await crud_user.get_auth_state_with_permission_mask(db, id=user_id)
+    if state is not None:
+        permission_cache.set(user_id, (permission_mask, state.role_version))
+    return state, permission_mask
+
+
+async def get_permission_mask_for_user(db: AsyncSession, user_id: int, role_version: int) -> int:
+    """
+    Returns the OR of the permission masks of all the user's roles, given
+    the user's current `role_version`. The result is cached per user id and
+    invalidated by the RBAC CRUD layer whenever the user's grants change.
+    """
+    cached = permission_cache.get(user_id)
+    if cached is not None and cached[1] == role_version:
+        return cached[0]
+    _, permission_mask = await _load_permission_mask(db, user_id)
+    return permission_mask
+
+
+async def current_principal(
+    token: str = Depends(bearer_transport.scheme),
+    db: AsyncSession = Depends(get_db),
+) -> Principal:
+    """
+    Authenticates the request for the permission dependencies without
+    loading the `User` ORM object or its roles.
+    - Tokens carrying permission claims ("pm"/"rv") are trusted as long as
+      the user's `role_version` still matches. The user's authentication
+      columns are cached for AUTH_STATE_CACHE_TTL_SECONDS, so a matching
+      token needs no query; a deactivation or grant change made through
+      another worker is seen once the entry expires.
+    - Otherwise the user columns are fetched, and the permission cache is
+      used if its entry was built at the same `role_version`; on a miss the
+      user columns and role permission masks come from a single query.
+    """
+    claims = read_token_claims(token)
+    if claims is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    try:
+        user_id = int(claims["sub"])
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    if "pm" in claims:
+        state = auth_state_cache.get(user_id)
+        if state is None or claims.get("rv") != state.role_version:
+            # A miss, or a token issued after the entry was cached.
+            state = await crud_user.get_auth_state(db, id=user_id)
+            if state is not None:
+                auth_state_cache.set(user_id, state)
+        if state is not None and claims.get("rv") == state.role_version:
+            permission_mask = int(claims["pm"])
+        else:
+            state, permission_mask = await _load_permission_mask(db, user_id)
+    else:
+        cached = permission_cache.get(user_id)
+        state = permission_mask = None
+        if cached is not None:
+            state = await crud_user.get_auth_state(db, id=user_id)
+            if state is not None and cached[1] == state.role_version:
+                permission_mask = cached[0]
+        if permission_mask is None:
+            # A miss, or the grants changed since the entry was cached.
+            state, permission_mask = await _load_permission_mask(db, user_id)
+
+    if state is None or not state.is_active:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    set_session_user(db, state.id)
+    return Principal(id=state.id, email=state.email, permission_mask=permission_mask)
+
+
+async def get_read_db(principal: Principal = Depends(current_principal)):
+    """
+    A session for authenticated read-only endpoints, see `read_session`.
+    Depending on `current_principal` makes the token be read once, before
+    the session is picked.
+    """
+    async with await read_session(principal.id) as session:
+        yield session
+
+
 class RequiresPermission:
     def __init__(self, permission_name: str):
         self.permission_name = permission_name
+        # Unknown permissions compile to 0 and can never be satisfied.
+        self.permission_bit = perms.permission_bit(permission_name) or 0
 
-    async def __call__(self, user: User = Depends(current_active_user)):
-        user_permissions = {perm for role in user.roles for perm in role.permissions}
-
-        if self.permission_name not in user_permissions:
-            logger.warning(
-                f"User '{user.email}' lacks required permission '{self.permission_name}'."
+    async def __call__(self, principal: Principal = Depends(current_principal)):
+        if not self.permission_bit or principal.permission_mask & self.permission_bit != self.permission_bit:
+            throttled_logger.warning(
+                ("forbidden", principal.id, self.permission_name),
+                "User '{}' lacks required permission '{}'.", principal.email, self.permission_name,
             )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Missing required permission: {self.permission_name}",
             )
-        return user
+        return principal
 
 _method_to_action = {
     "GET": perms.ACTION_READ,
@@ -33,31 +145,78 @@ _method_to_action = {
     "DELETE": perms.ACTION_DELETE,
 }
 
+# (route path template, method) -> (permission, bit), compiled at startup
+# by `compile_route_permissions` so AutoPermission only does a dict lookup.
+_route_permissions: Dict[Tuple[str, str], Tuple[Optional[str], Optional[int]]] = {}
+
+
+def _infer_permission(path: str, method: str) -> Tuple[Optional[str], Optional[int]]:
+    """Infers the permission from a path and method, e.g. GET /api/v1/profiles/ -> "profiles:read"."""
+    path_parts = path.strip("/").split("/")
+    # e.g., ['api', 'v1', 'profiles', '{user_id}']
+    if len(path_parts) >= 3:
+        resource = path_parts[2]
+        action = _method_to_action.get(method)
+        if resource and action:
+            permission = f"{resource}:{action}"
+            return permission, perms.permission_bit(permission)
+    return None, None
+
+
+def _uses_inferred_permission(dependant: Dependant) -> bool:
+    for sub_dependant in dependant.dependencies:
+        if getattr(sub_dependant.call, "infers_permission", False):
+            return True
+        if _uses_inferred_permission(sub_dependant):
+            return True
+    return False
+
+
+def compile_route_permissions(routes: Iterable[BaseRoute]) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    Resolves the inferred permission of every route guarded by a non-overridden
+    AutoPermission once, and returns the (method, path, permission) entries whose
+    permission cannot be granted because it is not defined in AppPermissions.
+    """
+    unknown = []
+    for route in routes:
+        if not isinstance(route, APIRoute) or not _uses_inferred_permission(route.dependant):
+            continue
+        for method in route.methods:
+            permission, bit = _infer_permission(route.path, method)
+            _route_permissions[(route.path, method)] = (permission, bit)
+            if bit is None:
+                unknown.append((method, route.path, permission))
+    return unknown
+
+
 def AutoPermission(override: Optional[str] = None):
     """
     A dependency that automatically determines and checks permissions.
     - If 'override' is provided, it uses that permission string.
-    - Otherwise, it infers the permission from the request's URL and method.
+    - Otherwise, it infers the permission from the route's path and method.
       e.g., GET /api/v1/profiles/ -> requires "profiles:read"
     """
 
-    async def dependency(request: Request, user: User = Depends(current_active_user)):
+    override_bit = perms.permission_bit(override) if override else None
+
+    async def dependency(request: Request, principal: Principal = Depends(current_principal)):
         required_permission = override
+        required_bit = override_bit
 
         if not required_permission:
-            # Infer from request path and method
-            path_parts = request.url.path.strip("/").split("/")
-            # e.g., ['api', 'v1', 'profiles', '1']
-            if len(path_parts) >= 3:
-                resource = path_parts[2]
-                action = _method_to_action.get(request.method)
-                if resource and action:
-                    required_permission = f"{resource}:{action}"
+            route = request.scope.get("route")
+            entry = _route_permissions.get((route.path, request.method)) if route else None
+            if entry is None:
+                # Route was not compiled at startup, infer from the request itself
+                entry = _infer_permission(request.url.path, request.method)
+            required_permission, required_bit = entry
 
         if not required_permission:
             # If permission cannot be determined, deny access as a security precaution
-            logger.warning(
-                f"Could not determine permission for {request.method} {request.url.path}"
+            throttled_logger.warning(
+                ("undetermined-permission", request.method, request.url.path),
+                "Could not determine permission for {} {}", request.method, request.url.path,
             )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -65,16 +224,18 @@ def AutoPermission(override: Optional[str] = None):
             )
 
         # Check if user has the required permission
-        user_permissions = {perm for role in user.roles for perm in role.permissions}
-        if required_permission not in user_permissions:
-            logger.warning(
-                f"User '{user.email}' lacks required permission '{required_permission}' for {request.method} {request.url.path}"
+        if not required_bit or principal.permission_mask & required_bit != required_bit:
+            throttled_logger.warning(
+                ("forbidden", principal.id, required_permission),
+                "User '{}' lacks required permission '{}' for {} {}",
+                principal.email, required_permission, request.method, request.url.path,
             )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Missing required permission: {required_permission}",
             )
 
-        return user
+        return principal
 
-    return dependency
\ No newline at end of file
+    dependency.infers_permission = override is None
+    return dependency
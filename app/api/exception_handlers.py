@@ -5,6 +5,7 @@ from fastapi.exceptions import RequestValidationError
 from loguru import logger
 
 from app.core.exceptions import CustomException
+from app.crud.pagination import InvalidCursor
 
 async def custom_exception_handler(request: Request, exc: CustomException):
     """Handles exceptions defined in app/core/exceptions.py"""
@@ -23,6 +24,13 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         content={"detail": "Validation Error", "errors": errors},
     )
 
+async def invalid_cursor_exception_handler(request: Request, exc: InvalidCursor):
+    """Rejects malformed pagination cursors."""
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": str(exc)},
+    )
+
 async def generic_exception_handler(request: Request, exc: Exception):
     """
     Handles any unexpected exceptions.
@@ -37,4 +45,5 @@ async def generic_exception_handler(request: Request, exc: Exception):
 def setup_exception_handlers(app):
     app.add_exception_handler(CustomException, custom_exception_handler)
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.add_exception_handler(InvalidCursor, invalid_cursor_exception_handler)
     app.add_exception_handler(Exception, generic_exception_handler)
\ No newline at end of file
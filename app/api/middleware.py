@@ -0,0 +1,129 @@
+# app/api/middleware.py
+import re
+import time
+import uuid
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logging import request_id_var, throttled_logger
+from app.core.metrics import http_request_duration_seconds, http_requests_in_flight, http_requests_total
+from app.db.instrumentation import QueryStats, current_query_stats
+
+# Methods recorded as themselves; anything else a client sends is labelled
+# OTHER, so arbitrary method names cannot create new series.
+METRIC_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+class MetricsMiddleware:
+    """
+    Records request count, latency and in-flight requests per route template.
+    A plain ASGI middleware rather than BaseHTTPMiddleware, so it adds no task
+    or stream wrapping to the request path.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            # The router stores the matched route in the scope; using its path
+            # template keeps label cardinality bounded.
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            method = scope["method"] if scope["method"] in METRIC_METHODS else "OTHER"
+            http_requests_total.inc(method, route_path, str(status_code))
+            http_request_duration_seconds.observe(elapsed, method, route_path)
+
+
+class QueryStatsMiddleware:
+    """
+    Counts the SQL statements each request runs and reports them in a
+    `Server-Timing` header (`db;dur=<ms>;desc="<n> queries"`). Statement
+    shapes repeated N_PLUS_ONE_THRESHOLD times or more are logged as probable
+    N+1 loads. Statements that run after the response has started, e.g. in a
+    streamed body, are counted for the N+1 check but miss the header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing", f'db;dur={stats.total_seconds * 1000:.2f};desc="{stats.count} queries"'
+                )
+            await send(message)
+
+        token = current_query_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
+            for shape, count in stats.repeated_shapes(settings.N_PLUS_ONE_THRESHOLD):
+                route = scope.get("route")
+                throttled_logger.warning(
+                    ("n-plus-one", route.path if route else scope["path"], shape),
+                    "Probable N+1: {} {} ran this statement {} times: {}",
+                    scope["method"], scope["path"], count, shape[:200],
+                )
+
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+class RequestIdMiddleware:
+    """
+    Tags each request with an id, the caller's X-Request-ID if it is sane or
+    a new one otherwise. The id is attached to every log record of the
+    request, including sampled ones, and echoed in the response header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get(REQUEST_ID_HEADER)
+        if not request_id or not _VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        await self.app(scope, receive, send_wrapper)
+        # Not reset when the app raises, so the server error handler further
+        # out still logs with the id; the request's task ends right after.
+        request_id_var.reset(token)
@@ -0,0 +1,17 @@
+from fastapi import Response
+
+from app.crud.pagination import Page
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+
+
+def set_page_headers(response: Response, page: Page) -> None:
+    """
+    Exposes the cursors of a keyset page as response headers, so list
+    endpoints keep returning a plain JSON array.
+    """
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if page.prev_cursor:
+        response.headers[PREV_CURSOR_HEADER] = page.prev_cursor
@@ -0,0 +1,72 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Tuple
+
+from fastapi import Request, Response, status
+
+from app.api.deps import Principal
+from app.api.serialization import serialize_json
+from app.core.cache import response_cache
+
+CACHE_CONTROL = "private, no-cache"  # Clients may keep a copy but must revalidate it
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: Tuple[Tuple[str, str], ...]
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, so a W/ prefix is ignored.
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def cached_response(
+    request: Request,
+    principal: Principal,
+    tags: Tuple[str, ...],
+    response_model: Any,
+    build: Callable[[Response], Awaitable[Any]],
+) -> Response:
+    """
+    Serves a GET endpoint from `response_cache`, keyed by route, path and query
+    parameters and the caller's permission mask, with a strong ETag over the
+    body. `build` produces the content on a miss and may set headers on the
+    response it is given, e.g. the page cursors; errors it raises are not
+    cached. A matching If-None-Match gets a 304 without a body.
+
+    Authentication and permission checks still run on every request; only
+    the query and serialization are skipped. Entries built on another worker,
+    or from a lagging replica, can be stale for up to the cache TTL.
+    """
+    route = request.scope.get("route")
+    key = response_cache.key(
+        tags,
+        route.path if route else request.url.path,
+        tuple(sorted(request.path_params.items())),
+        request.url.query,
+        principal.permission_mask,
+    )
+    entry = response_cache.get(key)
+    if entry is None:
+        scratch = Response()
+        content = await build(scratch)
+        body = serialize_json(content, response_model)
+        entry = CachedResponse(
+            body=body,
+            etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+            headers=tuple(
+                (name, value) for name, value in scratch.headers.items()
+                if name not in ("content-length", "content-type")
+            ),
+        )
+        response_cache.set(key, entry)
+
+    headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL, **dict(entry.headers)}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
@@ -1,7 +1,14 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import RequiresPermission
+from app.api.deps import RequiresPermission, get_read_db
+from app.core import metrics
+from app.core.cache import auth_state_cache, permission_cache, response_cache
 from app.core.permissions import AppPermissions
+from app.db.session import pool_status, read_replicas
+from app.services.payment.schemas import PaymentSummaryRead
+from app.services.payment.service import PaymentService
+from app.services.payment.webhooks import webhook_processor
 
 router = APIRouter()
 
@@ -12,6 +19,31 @@ router = APIRouter()
 )
 async def get_system_status():
     """
-    Get system status. A placeholder for admin reports.
+    Get system status: request and provider latency, pool usage and cache
+    statistics for this worker process. The full series are on `/metrics`.
     """
-    return {"status": "ok", "message": "System is running"}
+    return {
+        "status": "ok",
+        "message": "System is running",
+        **metrics.summary(),
+        "db_pool": pool_status(),
+        "db_replicas": read_replicas.status(),
+        "permission_cache": permission_cache.stats(),
+        "auth_state_cache": auth_state_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "payment_webhooks": webhook_processor.stats(),
+    }
+
+
+@router.get(
+    "/users/{user_id}/payment-summary",
+    response_model=PaymentSummaryRead,
+    dependencies=[Depends(RequiresPermission(AppPermissions.REPORTS_VIEW))],
+)
+async def get_user_payment_summary(user_id: int, db: AsyncSession = Depends(get_read_db)):
+    """
+    Payment counts and totals for any user, by status and currency.
+    Served from the maintained summary rows; an unknown user has no totals.
+    """
+    payment_service = PaymentService(db)
+    return {"user_id": user_id, "totals": await payment_service.get_summary(user_id)}
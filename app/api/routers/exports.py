@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, AsyncIterator, Optional, Sequence
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.future import select
+
+from app.api.deps import RequiresPermission
+from app.core.permissions import AppPermissions
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from app.services.payment.models import Payment
+
+router = APIRouter()
+
+# Rows fetched from the server-side cursor and serialized per chunk.
+EXPORT_CHUNK_SIZE = 1000
+
+USER_EXPORT_COLUMNS = (User.id, User.email, User.is_active, User.is_superuser, User.is_verified)
+PAYMENT_EXPORT_COLUMNS = (
+    Payment.id, Payment.user_id, Payment.amount, Payment.currency, Payment.status,
+    Payment.provider, Payment.provider_order_id, Payment.provider_payment_id,
+    Payment.created_at, Payment.updated_at,
+)
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Timestamps are stored as naive UTC; an offset-aware bound is converted to match."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+async def _stream_rows(query: Select, columns: Sequence[Any], fmt: ExportFormat) -> AsyncIterator[str]:
+    """
+    Streams the query result from a server-side cursor, one serialized chunk
+    at a time, so memory use does not depend on the size of the table.
+    The session is opened here because the response body is produced after
+    request-scoped dependencies have been closed.
+    """
+    names = [column.key for column in columns]
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        if fmt is ExportFormat.CSV:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(names)
+            yield buffer.getvalue()
+            async for rows in result.partitions(EXPORT_CHUNK_SIZE):
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(rows)
+                yield buffer.getvalue()
+        else:
+            async for rows in result.partitions(EXPORT_CHUNK_SIZE):
+                yield "".join(
+                    json.dumps(dict(zip(names, row)), default=_json_default) + "\n" for row in rows
+                )
+
+
+def _export_response(query: Select, columns: Sequence[Any], fmt: ExportFormat, name: str) -> StreamingResponse:
+    if fmt is ExportFormat.CSV:
+        media_type, extension = "text/csv", "csv"
+    else:
+        media_type, extension = "application/x-ndjson", "ndjson"
+    return StreamingResponse(
+        _stream_rows(query, columns, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{extension}"'},
+    )
+
+
+@router.get(
+    "/users",
+    dependencies=[Depends(RequiresPermission(AppPermissions.USERS_READ))],
+)
+async def export_users(format: ExportFormat = ExportFormat.NDJSON, is_active: Optional[bool] = None):
+    """Stream all users as NDJSON or CSV."""
+    query = select(*USER_EXPORT_COLUMNS).order_by(User.id)
+    if is_active is not None:
+        query = query.where(User.is_active == is_active)
+    return _export_response(query, USER_EXPORT_COLUMNS, format, "users")
+
+
+@router.get(
+    "/payments",
+    dependencies=[Depends(RequiresPermission(AppPermissions.REPORTS_VIEW))],
+)
+async def export_payments(
+    format: ExportFormat = ExportFormat.NDJSON,
+    status: Optional[str] = None,
+    user_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+):
+    """
+    Stream payments as NDJSON or CSV.
+    Optionally filtered by status, user and a `[created_from, created_to)` date range;
+    bounds without an offset are taken as UTC.
+    """
+    query = select(*PAYMENT_EXPORT_COLUMNS).order_by(Payment.created_at, Payment.id)
+    if status:
+        query = query.where(Payment.status == status)
+    if user_id:
+        query = query.where(Payment.user_id == user_id)
+    if created_from:
+        query = query.where(Payment.created_at >= _naive_utc(created_from))
+    if created_to:
+        query = query.where(Payment.created_at < _naive_utc(created_to))
+    return _export_response(query, PAYMENT_EXPORT_COLUMNS, format, "payments")
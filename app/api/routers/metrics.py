@@ -0,0 +1,29 @@
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+router = APIRouter()
+
+
+def require_metrics_token(request: Request) -> None:
+    """
+    Allows the scrape only with `Authorization: Bearer <METRICS_TOKEN>`.
+    Without a configured token the endpoint does not exist.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, headers={"WWW-Authenticate": "Bearer"})
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+async def get_metrics():
+    """Prometheus scrape endpoint, authenticated with METRICS_TOKEN."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,26 +1,32 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import AutoPermission
+from app.api.deps import AutoPermission, Principal, get_permission_mask_for_user, get_read_db
+from app.api.pagination import set_page_headers
+from app.api.response_cache import cached_response
+from app.api.serialization import model_response
 from app.core import permissions as perms
-from app.auth.auth import fastapi_users, get_user_manager
-from app.crud import crud_user
+from app.auth.auth import fastapi_users, fastapi_users_with_roles, get_user_manager
+from app.crud.crud_user import WITH_ROLES, crud_user
 from app.db.session import get_db
 from app.models.user import User
-from app.schemas.user import UserRead, UserUpdate
+from app.schemas.batch import BatchDelete, BatchResult
+from app.schemas.user import UserBatchCreate, UserBatchUpdate, UserRead, UserUpdate
 
 router = APIRouter()
 
 current_active_user = fastapi_users.current_user(active=True)
+current_active_user_with_roles = fastapi_users_with_roles.current_user(active=True)
 
 
 @router.get(
     "/me",
     response_model=UserRead,
 )
-async def read_users_me(current_user: User = Depends(current_active_user)):
+async def read_users_me(current_user: User = Depends(current_active_user_with_roles)):
     """
     Get current user.
     """
@@ -48,49 +54,120 @@ async def update_user_me(
 async def read_users(
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Retrieve users.
+    Pages are keyset-paginated by id: pass the `X-Next-Cursor` / `X-Prev-Cursor`
+    response headers back as `after` / `before`. `skip` is kept for
+    compatibility and falls back to offset pagination.
+    """
+    if skip:
+        return model_response(await crud_user.get_multi(db, skip=skip, limit=limit, options=WITH_ROLES), List[UserRead])
+    page = await crud_user.get_page(db, limit=limit, after=after, before=before, options=WITH_ROLES)
+    response = model_response(page.items, List[UserRead])
+    set_page_headers(response, page)
+    return response
+
+
+@router.post(
+    "/batch",
+    response_model=List[UserRead],
+    dependencies=[Depends(AutoPermission(override=perms.AppPermissions.USERS_MANAGE))],
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_users_batch(users_in: List[UserBatchCreate], db: AsyncSession = Depends(get_db)):
     """
-    users = await crud_user.get_multi(db, skip=skip, limit=limit)
-    return users
+    Create many users in one transaction, e.g. for onboarding.
+    Unlike registration, no user manager hooks run for these users.
+    Superusers and verified users cannot be created here.
+    """
+    try:
+        return await crud_user.create_many(db, objs_in=users_in)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="User emails must be unique")
+
+
+@router.patch(
+    "/batch",
+    response_model=BatchResult,
+    dependencies=[Depends(AutoPermission(override=perms.AppPermissions.USERS_MANAGE))],
+)
+async def update_users_batch(users_in: List[UserBatchUpdate], db: AsyncSession = Depends(get_db)):
+    """
+    Update many users in one transaction. Unknown user ids are skipped.
+    Superusers can only be changed through the superuser-only /users routes.
+    """
+    if await crud_user.get_superuser_ids(db, ids=[user_in.id for user_in in users_in]):
+        raise HTTPException(status_code=403, detail="Superusers cannot be updated in a batch")
+    updates = [user_in.model_dump(exclude_unset=True) for user_in in users_in]
+    try:
+        count = await crud_user.update_many(db, updates=updates)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="User email already in use")
+    return BatchResult(count=count)
+
+
+@router.post(
+    "/batch/delete",
+    response_model=BatchResult,
+    dependencies=[Depends(AutoPermission(override=perms.AppPermissions.USERS_MANAGE))],
+)
+async def delete_users_batch(batch: BatchDelete, db: AsyncSession = Depends(get_db)):
+    """Delete many users in one transaction."""
+    count = await crud_user.remove_many(db, ids=batch.ids)
+    return BatchResult(count=count)
 
 
 @router.get("/{user_id}", response_model=UserRead)
 async def read_user_by_id(
     user_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(AutoPermission(override=perms.AppPermissions.USERS_READ))
+    principal: Principal = Depends(AutoPermission(override=perms.AppPermissions.USERS_READ))
 ):
     """
     Get a specific user by id.
     A regular user can only see their own profile.
     An admin with 'users:read' can see any profile.
+    Responses are cached with an ETag, see `cached_response`.
     """
-    user_permissions = {perm for role in user.roles for perm in role.permissions}
+    if principal.id == user_id or principal.has_permission(perms.AppPermissions.USERS_READ):
+        async def build(response: Response):
+            target_user = await crud_user.get(db, id=user_id, options=WITH_ROLES)
+            if not target_user:
+                raise HTTPException(status_code=404, detail="User not found")
+            return target_user
+
+        return await cached_response(request, principal, ("users",), UserRead, build)
 
-    if user.id == user_id or perms.AppPermissions.USERS_READ in user_permissions:
-        target_user = await crud_user.get(db, id=user_id)
-        if not target_user:
-            raise HTTPException(status_code=404, detail="User not found")
-        return target_user
-        
     raise HTTPException(status_code=403, detail="Not authorized to access this user's data")
 
 
 @router.get(
     "/{user_id}/permissions",
     response_model=List[str],
-    dependencies=[Depends(AutoPermission(override=perms.AppPermissions.USERS_READ))],
 )
-async def get_user_permissions(user_id: int, db: AsyncSession = Depends(get_db)):
+async def get_user_permissions(
+    user_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    principal: Principal = Depends(AutoPermission(override=perms.AppPermissions.USERS_READ)),
+):
     """
     Get a flat list of all permission names for a specific user.
+    Responses are cached with an ETag, see `cached_response`.
     """
-    target_user = await crud_user.get(db, id=user_id)
-    if not target_user:
-        raise HTTPException(status_code=404, detail="User not found")
+    async def build(response: Response):
+        target_user = await crud_user.get_auth_state(db, id=user_id)
+        if not target_user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        permission_mask = await get_permission_mask_for_user(db, user_id, target_user.role_version)
+        return sorted(perms.mask_to_permissions(permission_mask))
 
-    user_permissions = {perm for role in target_user.roles for perm in role.permissions}
-    return sorted(list(user_permissions))
+    return await cached_response(request, principal, ("users",), List[str], build)
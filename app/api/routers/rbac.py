@@ -1,12 +1,17 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import RequiresPermission
-from app.core.permissions import AppPermissions
+from app.api.deps import Principal, RequiresPermission, get_read_db
+from app.api.pagination import set_page_headers
+from app.api.response_cache import cached_response
+from app.api.serialization import model_response
+from app.core.permissions import AppPermissions, permission_bit
 from app.db.session import get_db
 from app.crud import crud_rbac, crud_user
 from app.schemas import rbac as rbac_schemas
+from app.schemas.batch import BatchDelete, BatchResult
 from app.models.rbac import Role
 
 router = APIRouter()
@@ -30,23 +35,86 @@ async def create_new_role(role_in: rbac_schemas.RoleCreate, db: AsyncSession = D
 @router.get(
     "/roles",
     response_model=List[rbac_schemas.RoleRead],
+)
+async def get_all_roles(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    principal: Principal = Depends(RequiresPermission(AppPermissions.RBAC_MANAGE)),
+):
+    """
+    Get all roles. Keyset-paginated by id, see `read_users`.
+    Responses are cached with an ETag, see `cached_response`.
+    """
+    async def build(response: Response):
+        if skip:
+            return await crud_rbac.crud_role.get_multi(db, skip=skip, limit=limit)
+        page = await crud_rbac.crud_role.get_page(db, limit=limit, after=after, before=before)
+        set_page_headers(response, page)
+        return page.items
+
+    return await cached_response(request, principal, ("roles",), List[rbac_schemas.RoleRead], build)
+
+@router.post(
+    "/roles/batch",
+    response_model=List[rbac_schemas.RoleRead],
+    dependencies=[Depends(RequiresPermission(AppPermissions.RBAC_MANAGE))],
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_roles_batch(roles_in: List[rbac_schemas.RoleCreate], db: AsyncSession = Depends(get_db)):
+    """Create many roles in one transaction."""
+    try:
+        return await crud_rbac.crud_role.create_many(db, objs_in=roles_in)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Role names must be unique")
+
+@router.patch(
+    "/roles/batch",
+    response_model=BatchResult,
     dependencies=[Depends(RequiresPermission(AppPermissions.RBAC_MANAGE))],
 )
-async def get_all_roles(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
-    """Get all roles."""
-    return await crud_rbac.crud_role.get_multi(db, skip=skip, limit=limit)
+async def update_roles_batch(roles_in: List[rbac_schemas.RoleBatchUpdate], db: AsyncSession = Depends(get_db)):
+    """Update many roles in one transaction. Unknown role ids are skipped."""
+    updates = [role_in.model_dump(exclude_unset=True) for role_in in roles_in]
+    try:
+        count = await crud_rbac.crud_role.update_many(db, updates=updates)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Role name already in use")
+    return BatchResult(count=count)
+
+@router.post(
+    "/roles/batch/delete",
+    response_model=BatchResult,
+    dependencies=[Depends(RequiresPermission(AppPermissions.RBAC_MANAGE))],
+)
+async def delete_roles_batch(batch: BatchDelete, db: AsyncSession = Depends(get_db)):
+    """Delete many roles in one transaction."""
+    count = await crud_rbac.crud_role.remove_many(db, ids=batch.ids)
+    return BatchResult(count=count)
 
 @router.get(
     "/roles/{role_id}",
     response_model=rbac_schemas.RoleRead,
-    dependencies=[Depends(RequiresPermission(AppPermissions.RBAC_MANAGE))],
 )
-async def get_role_by_id(role_id: int, db: AsyncSession = Depends(get_db)):
-    """Get a single role by its ID."""
-    role = await crud_rbac.crud_role.get(db, id=role_id)
-    if not role:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, "Role not found")
-    return role
+async def get_role_by_id(
+    role_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    principal: Principal = Depends(RequiresPermission(AppPermissions.RBAC_MANAGE)),
+):
+    """Get a single role by its ID. Responses are cached with an ETag."""
+    async def build(response: Response):
+        role = await crud_rbac.crud_role.get(db, id=role_id)
+        if not role:
+            raise HTTPException(status.HTTP_404_NOT_FOUND, "Role not found")
+        return role
+
+    return await cached_response(request, principal, ("roles",), rbac_schemas.RoleRead, build)
 
 @router.patch(
     "/roles/{role_id}",
@@ -82,6 +150,51 @@ async def delete_role_by_id(role_id: int, db: AsyncSession = Depends(get_db)):
 # RBAC Management for Assignments
 # -------------------------------
 
+@router.post(
+    "/roles/{role_id}/users/assign",
+    response_model=BatchResult,
+    dependencies=[Depends(RequiresPermission(AppPermissions.RBAC_MANAGE))],
+)
+async def assign_role_to_users(role_id: int, users_in: rbac_schemas.UserIds, db: AsyncSession = Depends(get_db)):
+    """Assign a role to many users. Unknown users and existing assignments are skipped."""
+    role = await crud_rbac.crud_role.get(db, id=role_id)
+    if not role:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Role not found")
+    count = await crud_rbac.assign_role_to_users(db, role_id=role_id, user_ids=users_in.user_ids)
+    return BatchResult(count=count)
+
+@router.post(
+    "/roles/{role_id}/users/revoke",
+    response_model=BatchResult,
+    dependencies=[Depends(RequiresPermission(AppPermissions.RBAC_MANAGE))],
+)
+async def remove_role_from_users(role_id: int, users_in: rbac_schemas.UserIds, db: AsyncSession = Depends(get_db)):
+    """Remove a role from many users."""
+    count = await crud_rbac.remove_role_from_users(db, role_id=role_id, user_ids=users_in.user_ids)
+    return BatchResult(count=count)
+
+@router.post(
+    "/users/{user_id}/roles/assign",
+    response_model=BatchResult,
+    dependencies=[Depends(RequiresPermission(AppPermissions.RBAC_MANAGE))],
+)
+async def assign_roles_to_user(user_id: int, roles_in: rbac_schemas.RoleIds, db: AsyncSession = Depends(get_db)):
+    """Assign many roles to a user. Unknown roles and existing assignments are skipped."""
+    if not await crud_user.crud_user.get_auth_state(db, id=user_id):
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
+    count = await crud_rbac.assign_roles_to_user(db, user_id=user_id, role_ids=roles_in.role_ids)
+    return BatchResult(count=count)
+
+@router.post(
+    "/users/{user_id}/roles/revoke",
+    response_model=BatchResult,
+    dependencies=[Depends(RequiresPermission(AppPermissions.RBAC_MANAGE))],
+)
+async def remove_roles_from_user(user_id: int, roles_in: rbac_schemas.RoleIds, db: AsyncSession = Depends(get_db)):
+    """Remove many roles from a user."""
+    count = await crud_rbac.remove_roles_from_user(db, user_id=user_id, role_ids=roles_in.role_ids)
+    return BatchResult(count=count)
+
 @router.post(
     "/users/{user_id}/roles/{role_id}",
     response_model=rbac_schemas.RoleRead, # Consider a UserReadWithRoles schema
@@ -89,7 +202,7 @@ async def delete_role_by_id(role_id: int, db: AsyncSession = Depends(get_db)):
 )
 async def assign_role_to_user(user_id: int, role_id: int, db: AsyncSession = Depends(get_db)):
     """Assign a role to a user."""
-    user = await crud_user.crud_user.get(db, id=user_id)
+    user = await crud_user.crud_user.get(db, id=user_id, options=crud_user.WITH_ROLES)
     if not user:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
     role = await crud_rbac.crud_role.get(db, id=role_id)
@@ -105,7 +218,7 @@ async def assign_role_to_user(user_id: int, role_id: int, db: AsyncSession = Dep
 )
 async def remove_role_from_user(user_id: int, role_id: int, db: AsyncSession = Depends(get_db)):
     """Remove a role from a user."""
-    user = await crud_user.crud_user.get(db, id=user_id)
+    user = await crud_user.crud_user.get(db, id=user_id, options=crud_user.WITH_ROLES)
     if not user:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
     role = await crud_rbac.crud_role.get(db, id=role_id)
@@ -113,4 +226,29 @@ async def remove_role_from_user(user_id: int, role_id: int, db: AsyncSession = D
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Role not found")
     
     await crud_rbac.remove_role_from_user(db, user=user, role=role)
-    return
\ No newline at end of file
+    return
+
+# Permission Lookups
+# ------------------
+
+@router.get(
+    "/permissions/{name}/users",
+    response_model=List[rbac_schemas.PermissionHolder],
+    dependencies=[Depends(RequiresPermission(AppPermissions.RBAC_MANAGE))],
+)
+async def get_permission_holders(
+    name: str,
+    limit: int = 100,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Users holding a permission through any of their roles. Keyset-paginated by id, see `read_users`."""
+    if permission_bit(name) is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Unknown permission")
+    page = await crud_rbac.get_users_with_permission_page(
+        db, permission=name, limit=limit, after=after, before=before
+    )
+    response = model_response(page.items, List[rbac_schemas.PermissionHolder])
+    set_page_headers(response, page)
+    return response
@@ -1,5 +1,6 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 
+import jwt
 from fastapi import Depends, Request
 from fastapi_users import BaseUserManager, FastAPIUsers, IntegerIDMixin
 from fastapi_users.authentication import (
@@ -7,11 +8,16 @@ from fastapi_users.authentication import (
     BearerTransport,
     JWTStrategy,
 )
+from fastapi_users.jwt import decode_jwt, generate_jwt
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession, async_object_session
+from sqlalchemy.orm import selectinload
 
+from app.core.cache import invalidate_users, response_cache
 from app.core.config import settings
-from app.db.session import get_db
+from app.crud.crud_user import crud_user
+from app.db.session import get_db, set_session_user
 from app.models.user import User
 from app.schemas.user import UserCreate
 
@@ -30,19 +36,120 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
         return user
 
 
+class UserDatabase(SQLAlchemyUserDatabase[User, int]):
+    """
+    User adapter for fastapi-users. Lookups load the roles only with
+    `load_roles`, for the routes that serialize the user; authentication
+    alone never needs them. Created and updated users are returned with
+    their roles. Its writes invalidate the cached user responses and
+    authentication state.
+    """
+
+    def __init__(self, session: AsyncSession, user_table: type[User], load_roles: bool = False):
+        super().__init__(session, user_table)
+        self.load_roles = load_roles
+
+    async def create(self, create_dict: Dict[str, Any]) -> User:
+        user = await super().create(create_dict)
+        response_cache.invalidate("users")
+        await self.session.refresh(user, ["roles"])
+        return user
+
+    async def update(self, user: User, update_dict: Dict[str, Any]) -> User:
+        user = await super().update(user, update_dict)
+        invalidate_users([user.id])
+        response_cache.invalidate("users")
+        await self.session.refresh(user, ["roles"])
+        return user
+
+    async def delete(self, user: User) -> None:
+        user_id = user.id
+        await super().delete(user)
+        invalidate_users([user_id])
+        response_cache.invalidate("users")
+
+    async def _get_user(self, statement: Select) -> Optional[User]:
+        if self.load_roles:
+            statement = statement.options(selectinload(User.roles))
+        return await super()._get_user(statement)
+
+
 async def get_user_db(session: AsyncSession = Depends(get_db)):
-    yield SQLAlchemyUserDatabase(session, User)
+    yield UserDatabase(session, User)
+
+
+async def get_user_db_with_roles(session: AsyncSession = Depends(get_db)):
+    yield UserDatabase(session, User, load_roles=True)
 
 
 async def get_user_manager(user_db: SQLAlchemyUserDatabase = Depends(get_user_db)):
     yield UserManager(user_db)
 
 
+async def get_user_manager_with_roles(user_db: SQLAlchemyUserDatabase = Depends(get_user_db_with_roles)):
+    yield UserManager(user_db)
+
+
 bearer_transport = BearerTransport(tokenUrl="/api/v1/auth/jwt/login")
 
 
+class SessionJWTStrategy(JWTStrategy[User, int]):
+    """
+    A JWT strategy that records the authenticated user on the request's
+    session, so commits made through it count as that user's writes.
+    """
+
+    async def read_token(
+        self, token: Optional[str], user_manager: BaseUserManager[User, int]
+    ) -> Optional[User]:
+        user = await super().read_token(token, user_manager)
+        if user is not None:
+            set_session_user(user_manager.user_db.session, user.id)
+        return user
+
+
+class PermissionClaimsJWTStrategy(SessionJWTStrategy):
+    """
+    A JWT strategy that signs the user's effective permission mask ("pm") and
+    their role version ("rv") into the token, so permission checks can be
+    answered from the token alone.
+    """
+
+    async def write_token(self, user: User) -> str:
+        # One column query on the session that loaded the user; its roles are not loaded.
+        _, permission_mask = await crud_user.get_auth_state_with_permission_mask(
+            async_object_session(user), id=user.id
+        )
+        data = {
+            "sub": str(user.id),
+            "aud": self.token_audience,
+            "email": user.email,
+            "pm": permission_mask,
+            "rv": user.role_version,
+        }
+        return generate_jwt(
+            data, self.encode_key, self.lifetime_seconds, algorithm=self.algorithm
+        )
+
+
 def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(secret=settings.SECRET_KEY, lifetime_seconds=3600)
+    if settings.JWT_PERMISSION_CLAIMS:
+        return PermissionClaimsJWTStrategy(secret=settings.SECRET_KEY, lifetime_seconds=3600)
+    return SessionJWTStrategy(secret=settings.SECRET_KEY, lifetime_seconds=3600)
+
+
+def read_token_claims(token: str) -> Optional[Dict[str, Any]]:
+    """Decodes and verifies an access token without touching the database."""
+    strategy = get_jwt_strategy()
+    try:
+        data = decode_jwt(
+            token, strategy.decode_key, strategy.token_audience, algorithms=[strategy.algorithm]
+        )
+    except jwt.PyJWTError:
+        return None
+    if "sub" not in data:
+        return None
+    return data
 
 
 auth_backend = AuthenticationBackend(
@@ -51,4 +158,6 @@ auth_backend = AuthenticationBackend(
     get_strategy=get_jwt_strategy,
 )
 
-fastapi_users = FastAPIUsers[User, int](get_user_manager, [auth_backend]) 
\ No newline at end of file
+fastapi_users = FastAPIUsers[User, int](get_user_manager, [auth_backend])
+# For the routes that return a UserRead, which embeds the user's roles.
+fastapi_users_with_roles = FastAPIUsers[User, int](get_user_manager_with_roles, [auth_backend])
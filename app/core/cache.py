@@ -0,0 +1,125 @@
+# app/core/cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Iterable, Optional, TypeVar
+
+from app.core.config import settings
+
+ValueType = TypeVar("ValueType")
+
+
+class TTLCache(Generic[ValueType]):
+    """
+    A small in-process cache with a bounded size, per-entry TTL and LRU eviction.
+    - Entries older than `ttl_seconds` are treated as missing.
+    - When `max_size` is reached, the least recently used entry is evicted.
+    - Hit/miss counters are kept so the cache can be observed at runtime.
+
+    The cache is local to the worker process; invalidation does not propagate
+    across workers, so the TTL bounds how stale another worker can be.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple[float, ValueType]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[ValueType]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: ValueType) -> None:
+        if self.max_size <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def invalidate_many(self, keys) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# (effective permission mask, role_version it was built at) per user id,
+# used by the permission dependencies.
+permission_cache: TTLCache[tuple[int, int]] = TTLCache(
+    max_size=settings.PERMISSION_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PERMISSION_CACHE_TTL_SECONDS,
+)
+
+# The authentication columns (id, email, is_active, role_version) per user id,
+# checked against the role_version signed into permission-claims tokens.
+auth_state_cache: TTLCache[Any] = TTLCache(
+    max_size=settings.PERMISSION_CACHE_MAX_SIZE,
+    ttl_seconds=settings.AUTH_STATE_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_users(user_ids: Iterable[Hashable]) -> None:
+    """Drops what is cached to authorize these users, after their grants or account changed."""
+    user_ids = list(user_ids)
+    permission_cache.invalidate_many(user_ids)
+    auth_state_cache.invalidate_many(user_ids)
+
+
+class ResponseCache:
+    """
+    Serialized responses, tagged with the data they were built from ("roles",
+    "users"). Invalidating a tag bumps its generation, which is part of every
+    key, so entries built before a write are never served again and simply
+    age out of the LRU.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.entries: TTLCache[Any] = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._generations: Dict[str, int] = {}
+
+    def key(self, tags: tuple[str, ...], *parts: Hashable) -> Hashable:
+        return (tuple(self._generations.get(tag, 0) for tag in tags), *parts)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        return self.entries.get(key)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self.entries.set(key, value)
+
+    def invalidate(self, *tags: str) -> None:
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def stats(self) -> dict[str, Any]:
+        return self.entries.stats()
+
+
+response_cache = ResponseCache(
+    max_size=settings.RESPONSE_CACHE_MAX_SIZE,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
@@ -4,6 +4,19 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     DATABASE_URL: str
 
+    # Connection pool settings, applied to the primary and the replicas
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Retires connections before server-side idle timeouts
+    DB_POOL_PRE_PING: bool = False  # Costs a round trip per checkout
+    DB_STATEMENT_CACHE_SIZE: int | None = None  # asyncpg only; 0 behind PgBouncer in transaction mode
+
+    # Read replicas for read-only endpoints, e.g. '["postgresql+asyncpg://..."]'
+    READ_REPLICA_URLS: list[str] = []
+    READ_REPLICA_RETRY_SECONDS: float = 30.0  # How long a failed replica is skipped
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # Reads stay on the primary this long after a write
+
     # Settings for creating the first superuser
     FIRST_SUPERUSER_EMAIL: str
     FIRST_SUPERUSER_PASSWORD: str
@@ -12,6 +25,61 @@ class Settings(BaseSettings):
     RAZORPAY_KEY_ID: str | None = None
     RAZORPAY_KEY_SECRET: str | None = None
     DEFAULT_PAYMENT_PROVIDER: str = "razorpay"
+    RAZORPAY_WEBHOOK_SECRET: str | None = None
+    RAZORPAY_BASE_URL: str | None = None  # Override to point at a stub server
+    PAYMENT_PROVIDER_TIMEOUT_SECONDS: float = 10.0
+    PAYMENT_PROVIDER_MAX_WORKERS: int = 16
+
+    # Simulated gateway for load tests (DEFAULT_PAYMENT_PROVIDER=simulated)
+    SIMULATED_PROVIDER_LATENCY_MS: float = 100.0  # Median per call
+    SIMULATED_PROVIDER_JITTER_MS: float = 0.0  # Spread around the median
+    SIMULATED_PROVIDER_LATENCY_DISTRIBUTION: str = "fixed"  # fixed, uniform, normal or lognormal
+    SIMULATED_PROVIDER_ERROR_RATE: float = 0.0  # Fraction of calls that fail
+    SIMULATED_PROVIDER_TIMEOUT_RATE: float = 0.0  # Fraction of calls that hang past the timeout
+    SIMULATED_PROVIDER_SEED: int | None = None  # Fixes the random sequence for repeatable runs
+    SIMULATED_PROVIDER_SECRET: str | None = None  # Signs payments and webhooks; unset, nothing verifies
+
+    # Idempotency-Key handling for payment creation
+    IDEMPOTENCY_CACHE_MAX_SIZE: int = 10_000
+    IDEMPOTENCY_CACHE_TTL_SECONDS: float = 3600.0
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: float = 60.0  # After this an unfinished claim is abandoned
+
+    # Provider webhook ingestion
+    WEBHOOK_QUEUE_MAX_SIZE: int = 10_000
+    WEBHOOK_ENQUEUE_TIMEOUT_SECONDS: float = 1.0  # Then the webhook is refused with a 503
+    WEBHOOK_BATCH_SIZE: int = 500
+    WEBHOOK_BATCH_WAIT_SECONDS: float = 0.05  # How long to wait for a batch to fill up
+    WEBHOOK_DEDUP_TTL_SECONDS: float = 24 * 3600.0
+
+    # Sign permission claims and a role-version stamp into access tokens
+    JWT_PERMISSION_CLAIMS: bool = False
+
+    # Effective-permission cache settings
+    PERMISSION_CACHE_MAX_SIZE: int = 10_000
+    PERMISSION_CACHE_TTL_SECONDS: float = 60.0
+    # With permission claims, how long a user's active flag and role_version are
+    # trusted without a query; changes made through another worker wait this long
+    AUTH_STATE_CACHE_TTL_SECONDS: float = 5.0
+
+    # Serialized responses of the cached RBAC and profile reads
+    RESPONSE_CACHE_MAX_SIZE: int = 1000
+    RESPONSE_CACHE_TTL_SECONDS: float = 30.0
+
+    # Rows per statement for the bulk CRUD operations
+    BULK_CHUNK_SIZE: int = 1000
+
+    # Throttling of repetitive hot-path log lines, per message key
+    LOG_RATE_LIMIT_BURST: int = 10  # Lines logged per key and window before sampling
+    LOG_RATE_LIMIT_WINDOW_SECONDS: float = 60.0
+    LOG_SAMPLE_EVERY: int = 100  # Past the burst, one line in this many is logged
+
+    # Bearer token Prometheus sends to scrape /metrics; unset, /metrics is not served
+    METRICS_TOKEN: str | None = None
+
+    # SQL instrumentation
+    SQL_INSTRUMENTATION_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    N_PLUS_ONE_THRESHOLD: int = 5  # Same statement this many times in one request
 
     model_config = SettingsConfigDict(env_file=".env")
 
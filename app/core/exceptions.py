@@ -20,4 +20,12 @@ class InactiveUserException(CustomException):
 
 class NotAdminException(CustomException):
     status_code = status.HTTP_403_FORBIDDEN
-    detail = "User does not have admin privileges."
\ No newline at end of file
+    detail = "User does not have admin privileges."
+
+class IdempotencyKeyInProgressException(CustomException):
+    status_code = status.HTTP_409_CONFLICT
+    detail = "A request with this Idempotency-Key is still being processed."
+
+class IdempotencyKeyReusedException(CustomException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    detail = "This Idempotency-Key was already used with a different request body."
@@ -1,22 +1,44 @@
 # app/core/logging.py
 import sys
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Hashable
+
 from loguru import logger
 
+from app.core.config import settings
+
+# Set per request by RequestIdMiddleware; "-" outside of requests.
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+def _add_request_id(record) -> None:
+    # Patchers run in the calling thread, before records are handed to the
+    # enqueued sinks, so the request's context is still current here.
+    record["extra"].setdefault("request_id", request_id_var.get())
+
+
 def setup_logging():
     """
     Configures the Loguru logger for the application.
     - Removes default handlers.
     - Adds a human-readable handler for development (stderr).
     - Adds a file handler for structured JSON logging in production.
+    Both sinks are enqueued: formatting and writing happen on a background
+    thread, off the request path. Every record carries the request id.
     """
     logger.remove()  # Remove default handler to avoid duplicate logs
+    logger.configure(patcher=_add_request_id)
 
     # Development-friendly logger
     logger.add(
         sys.stderr,
         level="INFO",
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | {extra[request_id]} | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
         colorize=True,
+        enqueue=True,        # A slow terminal or pipe must not block requests
+        catch=True,
     )
 
     # Production-ready file logger (structured JSON)
@@ -31,4 +53,69 @@ def setup_logging():
         catch=True,          # Catch exceptions from logger sinks
     )
 
-    logger.info("Logger configured successfully.")
\ No newline at end of file
+    logger.info("Logger configured successfully.")
+
+
+class _KeyWindow:
+    __slots__ = ("started_at", "count", "suppressed")
+
+    def __init__(self, started_at: float, suppressed: int):
+        self.started_at = started_at
+        self.count = 0
+        self.suppressed = suppressed
+
+
+class ThrottledLogger:
+    """
+    Rate limiting and sampling for log lines that can repeat on hot paths,
+    e.g. a 403 for every request of a misconfigured client.
+    - Per key, the first `burst` lines of each `window_seconds` are logged,
+      then one in every `sample_every`.
+    - The next line logged for a key reports how many were suppressed.
+    - Messages are loguru templates formatted only when the line is logged,
+      so suppressed lines cost a dict lookup.
+    Keys are kept in a bounded LRU; an evicted key simply starts over.
+    """
+
+    def __init__(self, burst: int, window_seconds: float, sample_every: int, max_keys: int = 10_000):
+        self.burst = burst
+        self.window_seconds = window_seconds
+        self.sample_every = max(sample_every, 1)
+        self.max_keys = max_keys
+        self._windows: "OrderedDict[Hashable, _KeyWindow]" = OrderedDict()
+
+    def _admit(self, key: Hashable) -> tuple[bool, int]:
+        now = time.monotonic()
+        window = self._windows.get(key)
+        if window is None or now - window.started_at >= self.window_seconds:
+            window = _KeyWindow(now, window.suppressed if window else 0)
+            self._windows[key] = window
+            while len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+        self._windows.move_to_end(key)
+
+        window.count += 1
+        over = window.count - self.burst
+        if over <= 0 or over % self.sample_every == 0:
+            suppressed, window.suppressed = window.suppressed, 0
+            return True, suppressed
+        window.suppressed += 1
+        return False, 0
+
+    def log(self, level: str, key: Hashable, message: str, *args: Any, **kwargs: Any) -> None:
+        allowed, suppressed = self._admit(key)
+        if not allowed:
+            return
+        if suppressed:
+            message += f" [{suppressed} similar suppressed]"
+        logger.opt(depth=2).log(level, message, *args, **kwargs)
+
+    def warning(self, key: Hashable, message: str, *args: Any, **kwargs: Any) -> None:
+        self.log("WARNING", key, message, *args, **kwargs)
+
+
+throttled_logger = ThrottledLogger(
+    burst=settings.LOG_RATE_LIMIT_BURST,
+    window_seconds=settings.LOG_RATE_LIMIT_WINDOW_SECONDS,
+    sample_every=settings.LOG_SAMPLE_EVERY,
+)
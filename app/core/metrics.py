@@ -0,0 +1,244 @@
+# app/core/metrics.py
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; covers fast cache hits up to provider timeouts.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """A gauge that is either set directly or read from `callback` at scrape time."""
+    type_name = "gauge"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+        self.callback = callback
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def set(self, value: float, *labels: str) -> None:
+        self.values[labels] = value
+
+    def collect(self) -> Dict[LabelValues, float]:
+        return self.callback() if self.callback else self.values
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, value in self.collect().items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class _HistogramSeries:
+    __slots__ = ("bucket_counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.bucket_counts = [0] * size  # Non-cumulative; cumulated when rendered
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.series: Dict[LabelValues, _HistogramSeries] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = _HistogramSeries(len(self.buckets))
+        series.bucket_counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def quantile(self, q: float, labels: Optional[LabelValues] = None) -> Optional[float]:
+        """
+        Estimates a quantile from the buckets, like PromQL's histogram_quantile.
+        Without `labels`, all series are merged.
+        """
+        if labels is not None:
+            series = [self.series[labels]] if labels in self.series else []
+        else:
+            series = list(self.series.values())
+        total = sum(s.count for s in series)
+        if not total:
+            return None
+        counts = [sum(s.bucket_counts[i] for s in series) for i in range(len(self.buckets))]
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank:
+                upper = self.buckets[i]
+                lower = self.buckets[i - 1] if i else 0.0
+                if upper == math.inf:
+                    return lower
+                return lower + (upper - lower) * ((rank - cumulative) / count if count else 0)
+            cumulative += count
+        return self.buckets[-2]
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series.bucket_counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            base = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{base} {_format_value(series.sum)}")
+            lines.append(f"{self.name}_count{base} {series.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-local metrics. Updates are plain dict operations on the event loop
+    thread, cheap enough to leave on in production. With several workers each
+    process exposes its own series; Prometheus aggregates them.
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.started_at = time.time()
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), callback=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format, version 0.0.4."""
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status code.", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."
+)
+app_startup_seconds = registry.gauge(
+    "app_startup_seconds", "Duration of the last application startup, by phase.", ("phase",)
+)
+payment_provider_request_duration_seconds = registry.histogram(
+    "payment_provider_request_duration_seconds",
+    "Payment provider API call latency.",
+    ("provider", "operation", "outcome"),
+)
+
+
+def _latency_summary(histogram: Histogram) -> Dict[str, Optional[float]]:
+    quantiles = {f"p{int(q * 100)}": histogram.quantile(q) for q in (0.5, 0.95, 0.99)}
+    return {name: None if value is None else round(value, 4) for name, value in quantiles.items()}
+
+
+def summary() -> Dict[str, object]:
+    """A compact view of the registry for the system-status endpoint."""
+    by_status_class: Dict[str, float] = {}
+    for (_, _, status), value in http_requests_total.values.items():
+        status_class = f"{status[0]}xx"
+        by_status_class[status_class] = by_status_class.get(status_class, 0) + value
+    provider_calls: Dict[str, float] = {}
+    for (provider, _, outcome), series in payment_provider_request_duration_seconds.series.items():
+        key = f"{provider}:{outcome}"
+        provider_calls[key] = provider_calls.get(key, 0) + series.count
+    return {
+        "uptime_seconds": round(time.time() - registry.started_at, 1),
+        "startup_seconds": {phase: round(value, 4) for (phase,), value in app_startup_seconds.values.items()},
+        "http": {
+            "in_flight": http_requests_in_flight.values.get((), 0),
+            "requests": sum(by_status_class.values()),
+            "by_status_class": by_status_class,
+            "latency_seconds": _latency_summary(http_request_duration_seconds),
+        },
+        "payment_provider": {
+            "calls": provider_calls,
+            "latency_seconds": _latency_summary(payment_provider_request_duration_seconds),
+        },
+    }
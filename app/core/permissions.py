@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Iterable, Optional
 
 class AppPermissions(str, Enum):
     """
@@ -27,6 +28,58 @@ class AppPermissions(str, Enum):
 
 # You can add more permission constants here as your application grows.
 
+# --- Permission Bits ---
+# Each permission owns a fixed bit in the compiled permission masks stored on
+# roles and signed into tokens. This table is append-only: never reorder or
+# reuse an index, and give every new permission the next free bit (< 63, the
+# masks are stored in a signed BIGINT column).
+PERMISSION_BITS: dict[AppPermissions, int] = {
+    AppPermissions.RBAC_MANAGE: 0,
+    AppPermissions.USERS_READ: 1,
+    AppPermissions.USERS_MANAGE: 2,
+    AppPermissions.REPORTS_VIEW: 3,
+    AppPermissions.PAYMENTS_CREATE: 4,
+}
+
+
+def check_permission_bits(bits: dict[AppPermissions, int]) -> None:
+    """
+    Raises ValueError unless every permission has its own bit below 63.
+    A permission without a bit would be dropped from every mask and so deny
+    everyone; this runs at import so the gap fails startup instead.
+    """
+    missing = set(AppPermissions) - bits.keys()
+    if missing:
+        raise ValueError(f"Permissions without a bit: {', '.join(sorted(p.value for p in missing))}")
+    if len(set(bits.values())) != len(bits):
+        raise ValueError("Permission bits must be unique")
+    out_of_range = [p.value for p, bit in bits.items() if not 0 <= bit < 63]
+    if out_of_range:
+        raise ValueError(f"Permission bits must be in [0, 63): {', '.join(sorted(out_of_range))}")
+
+
+check_permission_bits(PERMISSION_BITS)
+
+_bits_by_value = {permission.value: 1 << bit for permission, bit in PERMISSION_BITS.items()}
+
+
+def permission_bit(permission: str) -> Optional[int]:
+    """Returns the single-bit mask for a permission, or None if it is unknown."""
+    return _bits_by_value.get(permission)
+
+
+def permissions_to_mask(permissions: Iterable[str]) -> int:
+    """Compiles permission names into a mask. Unknown names are ignored."""
+    mask = 0
+    for permission in permissions:
+        mask |= _bits_by_value.get(permission, 0)
+    return mask
+
+
+def mask_to_permissions(mask: int) -> frozenset[str]:
+    """Expands a mask back into the permission names it grants."""
+    return frozenset(value for value, bit in _bits_by_value.items() if mask & bit)
+
 # --- Permission Actions ---
 # These can be useful for dynamic permission generation if needed
 ACTION_READ = "read"
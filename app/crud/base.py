@@ -1,10 +1,14 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import Row, delete, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.crud.pagination import Page, paginate
 from app.models.base_class import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -12,7 +16,15 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+def chunked(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Response cache tags invalidated by every write through this object.
+    cache_tags: Tuple[str, ...] = ()
+
     def __init__(self, model: Type[ModelType]):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
@@ -20,23 +32,46 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         * `model`: A SQLAlchemy model class
         """
         self.model = model
+        # Unique, ordered key used for keyset pagination.
+        if hasattr(model, "created_at"):
+            self.pagination_key = (model.created_at, model.id)
+        else:
+            self.pagination_key = (model.id,)
 
-    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
-        result = await db.get(self.model, id)
+    async def get(
+        self, db: AsyncSession, id: Any, *, options: Sequence[Any] = ()
+    ) -> Optional[ModelType]:
+        result = await db.get(self.model, id, options=options)
         return result
 
     async def get_multi(
-        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100, options: Sequence[Any] = ()
     ) -> List[ModelType]:
-        query = select(self.model).offset(skip).limit(limit)
+        query = select(self.model).options(*options).offset(skip).limit(limit)
         result = await db.execute(query)
         return result.scalars().all()
 
+    async def get_page(
+        self,
+        db: AsyncSession,
+        *,
+        limit: int = 100,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        options: Sequence[Any] = (),
+    ) -> Page[ModelType]:
+        """Keyset-paginated listing, see `app.crud.pagination.paginate`."""
+        query = select(self.model).options(*options)
+        return await paginate(
+            db, query, key_columns=self.pagination_key, limit=limit, after=after, before=before
+        )
+
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)  # type: ignore
         db.add(db_obj)
         await db.commit()
+        response_cache.invalidate(*self.cache_tags)
         await db.refresh(db_obj)
         return db_obj
 
@@ -57,6 +92,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 setattr(db_obj, field, update_data[field])
         db.add(db_obj)
         await db.commit()
+        response_cache.invalidate(*self.cache_tags)
         await db.refresh(db_obj)
         return db_obj
 
@@ -64,4 +100,91 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj = await db.get(self.model, id)
         await db.delete(obj)
         await db.commit()
-        return obj 
\ No newline at end of file
+        response_cache.invalidate(*self.cache_tags)
+        return obj
+
+    # Bulk operations
+    # ---------------
+    # Each runs as a single transaction with one statement per chunk, and skips
+    # the per-row refresh of the single-object methods above.
+
+    async def _create_values(self, objs_in: Sequence[CreateSchemaType]) -> List[Dict[str, Any]]:
+        """Column values for `create_many`; override to derive extra columns."""
+        return [jsonable_encoder(obj_in) for obj_in in objs_in]
+
+    async def _update_values(self, updates: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Column values for `update_many`; override to derive extra columns."""
+        return list(updates)
+
+    async def _after_create_many(self, db: AsyncSession, rows: Sequence[Row]) -> None:
+        """Runs in `create_many`'s transaction for each written chunk; override to maintain derived tables."""
+
+    async def _after_update_many(self, db: AsyncSession, updates: Sequence[Dict[str, Any]]) -> None:
+        """Runs in `update_many`'s transaction for each applied chunk; override to maintain derived tables."""
+
+    async def _before_remove_many(self, db: AsyncSession, ids: Sequence[int]) -> None:
+        """Runs in `remove_many`'s transaction before each chunk is deleted; override to clear dependent rows."""
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: Sequence[CreateSchemaType],
+        chunk_size: int = settings.BULK_CHUNK_SIZE,
+    ) -> List[Row]:
+        """Inserts all objects with multi-row `INSERT ... RETURNING` and returns the written rows."""
+        table = self.model.__table__
+        rows: List[Row] = []
+        for chunk in chunked(objs_in, chunk_size):
+            values = await self._create_values(chunk)
+            result = await db.execute(insert(table).returning(table), values)
+            written = result.all()
+            await self._after_create_many(db, written)
+            rows.extend(written)
+        await db.commit()
+        response_cache.invalidate(*self.cache_tags)
+        return rows
+
+    async def update_many(
+        self,
+        db: AsyncSession,
+        *,
+        updates: Sequence[Dict[str, Any]],
+        chunk_size: int = settings.BULK_CHUNK_SIZE,
+    ) -> int:
+        """
+        Applies partial updates, each a dict holding the primary key `id`, as an
+        executemany `UPDATE`. Unknown ids are skipped; returns the number of rows updated.
+        """
+        count = 0
+        for chunk in chunked(updates, chunk_size):
+            result = await db.execute(
+                select(self.model.id).where(self.model.id.in_([u["id"] for u in chunk]))
+            )
+            existing = set(result.scalars().all())
+            chunk = [u for u in chunk if u["id"] in existing]
+            if not chunk:
+                continue
+            await db.execute(update(self.model), await self._update_values(chunk))
+            await self._after_update_many(db, chunk)
+            count += len(chunk)
+        await db.commit()
+        response_cache.invalidate(*self.cache_tags)
+        return count
+
+    async def remove_many(
+        self,
+        db: AsyncSession,
+        *,
+        ids: Sequence[int],
+        chunk_size: int = settings.BULK_CHUNK_SIZE,
+    ) -> int:
+        """Deletes rows with `DELETE ... WHERE id IN (...)`; returns the number of rows deleted."""
+        count = 0
+        for chunk in chunked(ids, chunk_size):
+            await self._before_remove_many(db, chunk)
+            result = await db.execute(delete(self.model).where(self.model.id.in_(chunk)))
+            count += result.rowcount
+        await db.commit()
+        response_cache.invalidate(*self.cache_tags)
+        return count
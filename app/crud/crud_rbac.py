@@ -1,32 +1,291 @@
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from sqlalchemy import Row, Select, delete, exists, insert, literal, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.crud.base import CRUDBase
-from app.models.rbac import Role
+from app.core.cache import invalidate_users, response_cache
+from app.core.config import settings
+from app.core.permissions import permissions_to_mask
+from app.crud.base import CRUDBase, chunked
+from app.crud.pagination import Page, paginate
+from app.models.rbac import Role, role_permission_rows, role_permissions, user_role_association
 from app.models.user import User
 from app.schemas.rbac import RoleCreate, RoleUpdate
 
 
 class CRUDRole(CRUDBase[Role, RoleCreate, RoleUpdate]):
+    # User responses embed their roles.
+    cache_tags = ("roles", "users")
+
     async def get_by_name(self, db: AsyncSession, *, name: str) -> Role | None:
         result = await db.execute(select(self.model).filter(self.model.name == name))
         return result.scalars().first()
 
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Role,
+        obj_in: Union[RoleUpdate, Dict[str, Any]]
+    ) -> Role:
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        # Only a change to the permission list affects the holders' grants.
+        grants_changed = "permissions" in update_data
+        if grants_changed:
+            await bump_role_version_for_role(db, role_id=db_obj.id)
+        role = await super().update(db, db_obj=db_obj, obj_in=obj_in)
+        if grants_changed:
+            invalidate_users(await get_user_ids_for_role(db, role_id=role.id))
+        return role
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Role:
+        # Collect holders before the association rows are cascaded away.
+        user_ids = await get_user_ids_for_role(db, role_id=id)
+        await bump_role_version_for_role(db, role_id=id)
+        role = await super().remove(db, id=id)
+        invalidate_users(user_ids)
+        return role
+
+
+    async def _create_values(self, objs_in: Sequence[RoleCreate]) -> List[Dict[str, Any]]:
+        values = await super()._create_values(objs_in)
+        for row in values:
+            row["permission_mask"] = permissions_to_mask(row.get("permissions") or [])
+        return values
+
+    async def _update_values(self, updates: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        values = await super()._update_values(updates)
+        for row in values:
+            if "permissions" in row:
+                row["permission_mask"] = permissions_to_mask(row["permissions"] or [])
+        return values
+
+    # The bulk paths bypass the Role mapper events that keep role_permissions
+    # and user_role_association in step.
+
+    async def _after_create_many(self, db: AsyncSession, rows: Sequence[Row]) -> None:
+        await _replace_role_permissions(db, {row.id: row.permissions for row in rows})
+
+    async def _after_update_many(self, db: AsyncSession, updates: Sequence[Dict[str, Any]]) -> None:
+        await _replace_role_permissions(db, {u["id"]: u["permissions"] for u in updates if "permissions" in u})
+
+    async def _before_remove_many(self, db: AsyncSession, ids: Sequence[int]) -> None:
+        # Not left to ON DELETE CASCADE, which SQLite only honours with foreign keys on.
+        await db.execute(delete(role_permissions).where(role_permissions.c.role_id.in_(ids)))
+        await db.execute(delete(user_role_association).where(user_role_association.c.role_id.in_(ids)))
+
+    async def update_many(
+        self,
+        db: AsyncSession,
+        *,
+        updates: Sequence[Dict[str, Any]],
+        chunk_size: int = settings.BULK_CHUNK_SIZE,
+    ) -> int:
+        changed_role_ids = [u["id"] for u in updates if "permissions" in u]
+        if changed_role_ids:
+            await bump_role_version_for_roles(db, role_ids=changed_role_ids)
+        count = await super().update_many(db, updates=updates, chunk_size=chunk_size)
+        if changed_role_ids:
+            invalidate_users(await get_user_ids_for_roles(db, role_ids=changed_role_ids))
+        return count
+
+    async def remove_many(
+        self,
+        db: AsyncSession,
+        *,
+        ids: Sequence[int],
+        chunk_size: int = settings.BULK_CHUNK_SIZE,
+    ) -> int:
+        user_ids = await get_user_ids_for_roles(db, role_ids=ids)
+        await bump_role_version_for_roles(db, role_ids=ids)
+        count = await super().remove_many(db, ids=ids, chunk_size=chunk_size)
+        invalidate_users(user_ids)
+        return count
+
 
 crud_role = CRUDRole(Role)
 
 
+async def _replace_role_permissions(db: AsyncSession, permissions_by_role: Dict[int, Sequence[str]]) -> None:
+    if not permissions_by_role:
+        return
+    await db.execute(delete(role_permissions).where(role_permissions.c.role_id.in_(list(permissions_by_role))))
+    rows = role_permission_rows(permissions_by_role)
+    if rows:
+        await db.execute(insert(role_permissions), rows)
+
+
+async def get_users_with_permission_page(
+    db: AsyncSession,
+    *,
+    permission: str,
+    limit: int = 100,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+) -> Page[User]:
+    """
+    Users holding `permission` through any of their roles, keyset-paginated by id.
+    One statement: role_permissions (by permission) joined to the role_id index
+    of user_role_association, as a semi-join so users with several matching
+    roles appear once.
+    """
+    holders = (
+        select(user_role_association.c.user_id)
+        .join(role_permissions, role_permissions.c.role_id == user_role_association.c.role_id)
+        .where(role_permissions.c.permission == permission)
+    )
+    query = select(User).where(User.id.in_(holders))
+    return await paginate(db, query, key_columns=(User.id,), limit=limit, after=after, before=before)
+
+
+async def get_user_ids_for_roles(db: AsyncSession, *, role_ids: Sequence[int]) -> List[int]:
+    result = await db.execute(
+        select(user_role_association.c.user_id)
+        .where(user_role_association.c.role_id.in_(role_ids))
+        .distinct()
+    )
+    return list(result.scalars().all())
+
+
+async def get_user_ids_for_role(db: AsyncSession, *, role_id: int) -> List[int]:
+    return await get_user_ids_for_roles(db, role_ids=[role_id])
+
+
+async def bump_role_version_for_roles(db: AsyncSession, *, role_ids: Sequence[int]) -> None:
+    """Marks every holder of the roles as having changed grants (not committed)."""
+    holders = select(user_role_association.c.user_id).where(user_role_association.c.role_id.in_(role_ids))
+    await db.execute(
+        update(User).where(User.id.in_(holders)).values(role_version=User.role_version + 1)
+    )
+
+
+async def bump_role_version_for_role(db: AsyncSession, *, role_id: int) -> None:
+    await bump_role_version_for_roles(db, role_ids=[role_id])
+
+
 async def assign_role_to_user(db: AsyncSession, *, user: User, role: Role) -> User:
     if role not in user.roles:
         user.roles.append(role)
+        user.role_version += 1
         await db.commit()
         await db.refresh(user)
+        invalidate_users([user.id])
+        response_cache.invalidate("users")
     return user
 
 
 async def remove_role_from_user(db: AsyncSession, *, user: User, role: Role) -> User:
     if role in user.roles:
         user.roles.remove(role)
+        user.role_version += 1
         await db.commit()
         await db.refresh(user)
-    return user
\ No newline at end of file
+        invalidate_users([user.id])
+        response_cache.invalidate("users")
+    return user
+
+
+# Set-based assignments
+# ---------------------
+# These operate directly on user_role_association without loading any ORM
+# objects. Ids that do not exist are ignored, and so are assignments that
+# already exist (or revocations of assignments that do not). Only the users
+# whose assignments actually changed get their role_version bumped.
+
+async def _insert_assignments(db: AsyncSession, rows: Select) -> List[int]:
+    """
+    Inserts the (user_id, role_id) pairs selected by `rows` that are not
+    assigned yet; returns the user id of every new assignment.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert_ = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = (
+            insert_(user_role_association)
+            .from_select(["user_id", "role_id"], rows)
+            .on_conflict_do_nothing()
+            .returning(user_role_association.c.user_id)
+        )
+        return list((await db.execute(statement)).scalars())
+    # Elsewhere, skip the existing pairs up front. A concurrent assignment of
+    # the same pair can still fail the insert on the primary key.
+    user_id, role_id = rows.selected_columns
+    rows = rows.where(
+        ~exists().where(user_role_association.c.user_id == user_id, user_role_association.c.role_id == role_id)
+    )
+    new_rows = [{"user_id": row[0], "role_id": row[1]} for row in (await db.execute(rows)).all()]
+    if new_rows:
+        await db.execute(insert(user_role_association), new_rows)
+    return [row["user_id"] for row in new_rows]
+
+
+async def _delete_assignments(db: AsyncSession, *conditions) -> List[int]:
+    """Deletes the assignments matching `conditions`; returns the user id of each one deleted."""
+    if db.get_bind().dialect.delete_returning:
+        statement = delete(user_role_association).where(*conditions).returning(user_role_association.c.user_id)
+        return list((await db.execute(statement)).scalars())
+    user_ids = list((await db.execute(select(user_role_association.c.user_id).where(*conditions))).scalars())
+    if user_ids:
+        await db.execute(delete(user_role_association).where(*conditions))
+    return user_ids
+
+
+async def _mark_grants_changed(db: AsyncSession, user_ids: Sequence[int]) -> None:
+    for chunk in chunked(sorted(set(user_ids)), settings.BULK_CHUNK_SIZE):
+        await db.execute(
+            update(User).where(User.id.in_(chunk)).values(role_version=User.role_version + 1)
+        )
+
+
+async def _apply_grant_changes(db: AsyncSession, user_ids: Sequence[int]) -> int:
+    """Bumps role_version for the changed users and commits; returns the number of changed assignments."""
+    await _mark_grants_changed(db, user_ids)
+    await db.commit()
+    if user_ids:
+        invalidate_users(set(user_ids))
+        response_cache.invalidate("users")
+    return len(user_ids)
+
+
+async def assign_role_to_users(db: AsyncSession, *, role_id: int, user_ids: Sequence[int]) -> int:
+    """Assigns one role to many users; returns the number of new assignments."""
+    changed: List[int] = []
+    for chunk in chunked(user_ids, settings.BULK_CHUNK_SIZE):
+        existing_users = select(User.id, literal(role_id)).where(User.id.in_(chunk))
+        changed += await _insert_assignments(db, existing_users)
+    return await _apply_grant_changes(db, changed)
+
+
+async def remove_role_from_users(db: AsyncSession, *, role_id: int, user_ids: Sequence[int]) -> int:
+    """Revokes one role from many users; returns the number of removed assignments."""
+    changed: List[int] = []
+    for chunk in chunked(user_ids, settings.BULK_CHUNK_SIZE):
+        changed += await _delete_assignments(
+            db,
+            user_role_association.c.role_id == role_id,
+            user_role_association.c.user_id.in_(chunk),
+        )
+    return await _apply_grant_changes(db, changed)
+
+
+async def assign_roles_to_user(db: AsyncSession, *, user_id: int, role_ids: Sequence[int]) -> int:
+    """Assigns many roles to one user; returns the number of new assignments."""
+    changed: List[int] = []
+    for chunk in chunked(role_ids, settings.BULK_CHUNK_SIZE):
+        existing_roles = select(literal(user_id), Role.id).where(Role.id.in_(chunk))
+        changed += await _insert_assignments(db, existing_roles)
+    return await _apply_grant_changes(db, changed)
+
+
+async def remove_roles_from_user(db: AsyncSession, *, user_id: int, role_ids: Sequence[int]) -> int:
+    """Revokes many roles from one user; returns the number of removed assignments."""
+    changed: List[int] = []
+    for chunk in chunked(role_ids, settings.BULK_CHUNK_SIZE):
+        changed += await _delete_assignments(
+            db,
+            user_role_association.c.user_id == user_id,
+            user_role_association.c.role_id.in_(chunk),
+        )
+    return await _apply_grant_changes(db, changed)
@@ -1,10 +1,111 @@
-from app.crud.base import CRUDBase
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi_users.password import PasswordHelper
+from sqlalchemy import Row, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from app.core.cache import invalidate_users
+from app.core.config import settings
+from app.crud.base import CRUDBase, chunked
+from app.models.rbac import Role, user_role_association
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
+# Loader options for endpoints that serialize a user together with its roles.
+WITH_ROLES = (selectinload(User.roles),)
+
+password_helper = PasswordHelper()
+
+
+def _hash_passwords(values: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for row in values:
+        if "password" in row:
+            password = row.pop("password")
+            if password is not None:
+                row["hashed_password"] = password_helper.hash(password)
+    return values
+
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
-    pass
+    cache_tags = ("users",)
+
+    # Password hashing is CPU-bound, so it runs off the event loop.
+
+    async def _create_values(self, objs_in: Sequence[UserCreate]) -> List[Dict[str, Any]]:
+        values = [obj_in.model_dump(exclude={"id"}) for obj_in in objs_in]
+        return await run_in_threadpool(_hash_passwords, values)
+
+    async def _update_values(self, updates: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return await run_in_threadpool(_hash_passwords, [dict(u) for u in updates])
+
+    async def _before_remove_many(self, db: AsyncSession, ids: Sequence[int]) -> None:
+        # The bulk delete bypasses the User mapper event that clears assignments.
+        await db.execute(delete(user_role_association).where(user_role_association.c.user_id.in_(ids)))
+
+    # Deactivated and deleted users must stop authenticating, so their cached
+    # authentication state goes once the change is committed.
+
+    async def update_many(
+        self,
+        db: AsyncSession,
+        *,
+        updates: Sequence[Dict[str, Any]],
+        chunk_size: int = settings.BULK_CHUNK_SIZE,
+    ) -> int:
+        count = await super().update_many(db, updates=updates, chunk_size=chunk_size)
+        invalidate_users(u["id"] for u in updates)
+        return count
+
+    async def remove_many(
+        self,
+        db: AsyncSession,
+        *,
+        ids: Sequence[int],
+        chunk_size: int = settings.BULK_CHUNK_SIZE,
+    ) -> int:
+        count = await super().remove_many(db, ids=ids, chunk_size=chunk_size)
+        invalidate_users(ids)
+        return count
+
+    async def get_superuser_ids(self, db: AsyncSession, *, ids: Sequence[int]) -> List[int]:
+        """The ids among `ids` that belong to superusers."""
+        superuser_ids: List[int] = []
+        for chunk in chunked(ids, settings.BULK_CHUNK_SIZE):
+            result = await db.execute(select(User.id).where(User.id.in_(chunk), User.is_superuser))
+            superuser_ids.extend(result.scalars())
+        return superuser_ids
+
+    async def get_auth_state(self, db: AsyncSession, *, id: int) -> Optional[Row]:
+        """Loads only the user columns needed to authenticate a request."""
+        result = await db.execute(
+            select(User.id, User.email, User.is_active, User.role_version).where(User.id == id)
+        )
+        return result.first()
 
+    async def get_auth_state_with_permission_mask(
+        self, db: AsyncSession, *, id: int
+    ) -> Tuple[Optional[Row], int]:
+        """
+        Loads the authentication columns and the compiled permission masks of
+        all the user's roles in a single query, without materializing any ORM
+        objects. The returned mask is the OR of the role masks.
+        """
+        result = await db.execute(
+            select(User.id, User.email, User.is_active, User.role_version, Role.permission_mask)
+            .select_from(User)
+            .outerjoin(user_role_association, user_role_association.c.user_id == User.id)
+            .outerjoin(Role, Role.id == user_role_association.c.role_id)
+            .where(User.id == id)
+        )
+        rows = result.all()
+        if not rows:
+            return None, 0
+        mask = 0
+        for row in rows:
+            mask |= row.permission_mask or 0
+        return rows[0], mask
 
 crud_user = CRUDUser(User)
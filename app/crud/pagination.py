@@ -0,0 +1,112 @@
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Generic, List, Optional, Sequence, TypeVar
+
+from sqlalchemy import DateTime, Integer, Select, String, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+ItemType = TypeVar("ItemType")
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+@dataclass
+class Page(Generic[ItemType]):
+    items: List[ItemType] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _decode_value(value: Any, column: Any) -> Any:
+    """Checks a cursor value against its key column, so a forged cursor never reaches SQL."""
+    column_type = column.type
+    if isinstance(column_type, DateTime):
+        if not isinstance(value, str):
+            raise InvalidCursor("Invalid cursor")
+        parsed = datetime.fromisoformat(value)
+        if (parsed.tzinfo is not None) != bool(column_type.timezone):
+            raise InvalidCursor("Invalid cursor")
+        return parsed
+    if isinstance(column_type, Integer):
+        valid = isinstance(value, int) and not isinstance(value, bool) and -2**63 <= value < 2**63
+    elif isinstance(column_type, String):
+        valid = isinstance(value, str)
+    else:
+        valid = isinstance(value, (str, int, float)) and not isinstance(value, bool)
+    if not valid:
+        raise InvalidCursor("Invalid cursor")
+    return value
+
+
+def decode_cursor(cursor: str, key_columns: Sequence[Any]) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(key_columns):
+            raise InvalidCursor("Invalid cursor")
+        return [_decode_value(v, col) for v, col in zip(values, key_columns)]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def _key_of(item: Any, key_columns: Sequence[Any]) -> List[Any]:
+    return [getattr(item, col.key) for col in key_columns]
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    *,
+    key_columns: Sequence[Any],
+    limit: int,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+) -> Page:
+    """
+    Keyset pagination over `key_columns`, which must be unique together
+    (e.g. `(created_at, id)` or `(id,)`).
+    - `after` returns the rows following the cursor, `before` the rows preceding it.
+    - The cost of a page does not depend on its depth, and concurrent inserts
+      cannot shift rows between pages.
+    """
+    key = tuple_(*key_columns) if len(key_columns) > 1 else key_columns[0]
+
+    def bound(cursor: str):
+        values = decode_cursor(cursor, key_columns)
+        return tuple_(*values) if len(values) > 1 else values[0]
+
+    if before:
+        query = query.where(key < bound(before)).order_by(*[col.desc() for col in key_columns])
+    else:
+        if after:
+            query = query.where(key > bound(after))
+        query = query.order_by(*[col.asc() for col in key_columns])
+
+    result = await db.execute(query.limit(limit + 1))
+    items = list(result.scalars().all())
+    has_more = len(items) > limit
+    items = items[:limit]
+
+    page = Page(items=items)
+    if before:
+        items.reverse()
+        if items:
+            page.next_cursor = encode_cursor(_key_of(items[-1], key_columns))
+            if has_more:
+                page.prev_cursor = encode_cursor(_key_of(items[0], key_columns))
+    elif items:
+        if has_more:
+            page.next_cursor = encode_cursor(_key_of(items[-1], key_columns))
+        if after:
+            page.prev_cursor = encode_cursor(_key_of(items[0], key_columns))
+    return page
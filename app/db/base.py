@@ -2,4 +2,5 @@
 from app.models.base_class import Base
 from app.models.user import User
 from app.models.rbac import Role
-from app.services.payment.models import Payment # noqa
\ No newline at end of file
+from app.models.seed_state import SeedState
+from app.services.payment.models import IdempotencyKey, Payment, PaymentSummary # noqa
\ No newline at end of file
@@ -1,3 +1,10 @@
+import hashlib
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
@@ -6,14 +13,75 @@ from app.core.permissions import AppPermissions
 from app.crud import crud_rbac
 from app.schemas.user import UserCreate
 from app.schemas import rbac as rbac_schemas
-from app.auth.auth import UserManager
+from app.auth.auth import UserDatabase, UserManager
+from app.db.session import engine
+from app.models.seed_state import SeedState
 from app.models.user import User
-from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
 from fastapi_users.exceptions import UserNotExists
 
 SUPER_ADMIN_ROLE = "Super Admin"
 
+SEED_NAME = "initial_data"
+SEED_VERSION = 1  # Bump whenever the seeding steps below change
+SEED_LOCK_KEY = 0x5EED_0001  # pg_advisory_lock key shared by all workers
+
+
+def seed_fingerprint() -> str:
+    """Changes whenever seeding could write something new."""
+    payload = {
+        "version": SEED_VERSION,
+        "permissions": sorted(p.value for p in AppPermissions),
+        "superuser": settings.FIRST_SUPERUSER_EMAIL,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+async def _applied_fingerprint(db: AsyncSession) -> Optional[str]:
+    return await db.scalar(select(SeedState.fingerprint).where(SeedState.name == SEED_NAME))
+
+
+@asynccontextmanager
+async def _seed_lock():
+    """
+    Serializes seeding across workers with a session-level advisory lock,
+    held on its own connection: seeding commits several times, and a
+    transaction-scoped lock would be released by the first commit.
+    Other databases run unlocked; SQLite serializes writers anyway.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    async with engine.connect() as conn:
+        await conn.execute(select(func.pg_advisory_lock(SEED_LOCK_KEY)))
+        try:
+            yield
+        finally:
+            await conn.execute(select(func.pg_advisory_unlock(SEED_LOCK_KEY)))
+
+
 async def seed_initial_data(db: AsyncSession):
+    """
+    Seeds the Super Admin role and the first superuser. Skipped, at the cost
+    of one primary-key lookup, when the stored fingerprint matches, so worker
+    boots do not write or contend on the admin role.
+    """
+    fingerprint = seed_fingerprint()
+    if await _applied_fingerprint(db) == fingerprint:
+        logger.info("Initial data is up to date, skipping seeding.")
+        return
+
+    async with _seed_lock():
+        # Another worker may have finished seeding while this one waited.
+        await db.rollback()
+        if await _applied_fingerprint(db) == fingerprint:
+            logger.info("Initial data was seeded by another worker.")
+            return
+        await _seed(db)
+        await db.merge(SeedState(name=SEED_NAME, fingerprint=fingerprint, applied_at=datetime.utcnow()))
+        await db.commit()
+
+
+async def _seed(db: AsyncSession):
     logger.info("Seeding initial data...")
     
     # 1. Create Super Admin role if it doesn't exist
@@ -29,14 +97,15 @@ async def seed_initial_data(db: AsyncSession):
         )
     else:
         # Ensure the admin role always has all permissions
-        admin_role.permissions = [p.value for p in AppPermissions]
-        db.add(admin_role)
-        await db.commit()
-        await db.refresh(admin_role)
+        all_permissions = [p.value for p in AppPermissions]
+        if set(admin_role.permissions) != set(all_permissions):
+            admin_role = await crud_rbac.crud_role.update(
+                db, db_obj=admin_role, obj_in={"permissions": all_permissions}
+            )
 
 
     # 2. Create the first superuser if it doesn't exist
-    user_db = SQLAlchemyUserDatabase(db, User)
+    user_db = UserDatabase(db, User)
     user_manager = UserManager(user_db)
     try:
         await user_manager.get_by_email(settings.FIRST_SUPERUSER_EMAIL)
@@ -48,4 +117,4 @@ async def seed_initial_data(db: AsyncSession):
         await crud_rbac.assign_role_to_user(db, user=new_user, role=admin_role)
         logger.info(f"Created first superuser: {settings.FIRST_SUPERUSER_EMAIL}")
 
-    logger.info("Initial data seeding complete.")
\ No newline at end of file
+    logger.info("Initial data seeding complete.")
@@ -0,0 +1,73 @@
+# app/db/instrumentation.py
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.logging import throttled_logger
+from app.core.metrics import registry
+
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds", "Database statement execution time."
+)
+
+
+@dataclass
+class QueryStats:
+    """Statements executed while serving one request."""
+    count: int = 0
+    total_seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def repeated_shapes(self, threshold: int) -> list[tuple[str, int]]:
+        """Statement shapes run at least `threshold` times: likely N+1 loads."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+# Set by QueryStatsMiddleware for the duration of a request.
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def redact_parameters(parameters: Any, executemany: bool) -> Any:
+    """Keeps the shape of bound parameters but never their values."""
+    if executemany:
+        return f"<{len(parameters)} parameter sets>"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started_at
+    db_query_duration_seconds.observe(elapsed)
+
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.total_seconds += elapsed
+        # Statements are parameterized, so identical text means identical shape.
+        stats.shapes[statement] += 1
+
+    if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        throttled_logger.warning(
+            ("slow-query", statement),
+            "Slow query ({:.1f} ms): {} params={}",
+            elapsed * 1000, statement, redact_parameters(parameters, executemany),
+        )
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attaches the statement listeners to a (sync) engine."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,12 +1,163 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+import itertools
+import time
+from typing import Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.logging import throttled_logger
+from app.core.metrics import registry
+from app.db.instrumentation import instrument_engine
+
+
+def _engine_options(url: str) -> dict:
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+    parsed = make_url(url)
+    # SQLite may get a StaticPool or NullPool, which take no sizing arguments.
+    if parsed.get_backend_name() != "sqlite":
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        )
+    if parsed.get_driver_name() == "asyncpg" and settings.DB_STATEMENT_CACHE_SIZE is not None:
+        options["connect_args"] = {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    return options
+
 
-engine = create_async_engine(settings.DATABASE_URL, pool_pre_ping=True)
+def _create_engine(url: str) -> AsyncEngine:
+    new_engine = create_async_engine(url, **_engine_options(url))
+    if settings.SQL_INSTRUMENTATION_ENABLED:
+        instrument_engine(new_engine.sync_engine)
+    return new_engine
+
+
+engine = _create_engine(settings.DATABASE_URL)
 AsyncSessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine, class_=AsyncSession
 )
 
+# Users who committed recently, keyed by user id, so their reads see their
+# own writes whichever of their tokens the reads carry.
+_recent_writers: TTLCache[bool] = TTLCache(max_size=10_000, ttl_seconds=settings.READ_YOUR_WRITES_SECONDS)
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session: Session) -> None:
+    # Set by the authentication dependencies once they have verified the token.
+    user_id = session.info.get("user_id")
+    if user_id is not None:
+        _recent_writers.set(user_id, True)
+
+
+def set_session_user(session: AsyncSession, user_id: int) -> None:
+    """Records the authenticated user on the request's session, so its commits count as their writes."""
+    session.info["user_id"] = user_id
+
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+class _Replica:
+    def __init__(self, url: str):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = _create_engine(url)
+        self.sessionmaker = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine, class_=AsyncSession
+        )
+        self.down_until = 0.0
+
+
+class ReadReplicas:
+    """
+    Round robin over the read replicas, skipping any that recently failed to
+    hand out a connection for READ_REPLICA_RETRY_SECONDS. A replica whose
+    pool is exhausted is skipped for that read only. With no healthy
+    replica, reads fall back to the primary.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [_Replica(url) for url in urls]
+        self._next = itertools.cycle(self.replicas)
+
+    async def session(self) -> Optional[AsyncSession]:
+        """A session with a checked-out replica connection, or None."""
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            replica = next(self._next)
+            if replica.down_until > now:
+                continue
+            session = replica.sessionmaker()
+            try:
+                await session.connection()
+                return session
+            except PoolTimeoutError:
+                # Every connection is in use: the replica is busy, not down,
+                # so it is skipped for this read only.
+                await session.close()
+                throttled_logger.warning(
+                    ("replica_pool_exhausted", replica.name), "Read replica {} pool exhausted, skipping it.", replica.name
+                )
+            except (DBAPIError, OSError) as e:
+                await session.close()
+                replica.down_until = now + settings.READ_REPLICA_RETRY_SECONDS
+                logger.warning(f"Read replica {replica.name} unavailable, skipping it: {e}")
+        return None
+
+    def status(self) -> List[Dict[str, object]]:
+        now = time.monotonic()
+        return [
+            {"replica": replica.name, "healthy": replica.down_until <= now, **pool_status(replica.engine)}
+            for replica in self.replicas
+        ]
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+read_replicas = ReadReplicas(settings.READ_REPLICA_URLS)
+
+
+async def read_session(user_id: Optional[int]) -> AsyncSession:
+    """
+    A session for reads: served by a replica unless the user committed
+    something in the last READ_YOUR_WRITES_SECONDS. The recent-writer
+    record is local to this worker process, like the permission cache.
+    """
+    session = None
+    if user_id is None or _recent_writers.get(user_id) is None:
+        session = await read_replicas.session()
+    if session is None:
+        session = AsyncSessionLocal()
+    return session
+
+
+def pool_status(pool_engine: AsyncEngine = engine) -> dict:
+    """Connection counts of the engine's pool; empty for pools that do not track them."""
+    pool = pool_engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+registry.gauge(
+    "db_pool_connections",
+    "Database pool connections by state.",
+    ("state",),
+    callback=lambda: {(state,): value for state, value in pool_status().items()},
+)
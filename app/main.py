@@ -1,37 +1,66 @@
+import time
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 from loguru import logger
 
 from app.core.config import settings
 from app.core.logging import setup_logging
+from app.core.metrics import app_startup_seconds
+from app.api.deps import compile_route_permissions
 from app.api.exception_handlers import setup_exception_handlers
-from app.db.session import engine, AsyncSessionLocal
+from app.api.middleware import MetricsMiddleware, QueryStatsMiddleware, RequestIdMiddleware
+from app.db.session import engine, AsyncSessionLocal, read_replicas
 from app.db.initial_data import seed_initial_data
-from app.api.routers import admin, profiles, rbac
-from app.auth.auth import auth_backend, fastapi_users
+from app.api.routers import admin, exports, metrics, profiles, rbac
+from app.auth.auth import auth_backend, fastapi_users, fastapi_users_with_roles
 from app.schemas.user import UserRead, UserCreate, UserUpdate
+from app.services.payment.providers.registry import payment_providers
 from app.services.payment.router import router as payment_router
+from app.services.payment.webhooks import webhook_processor
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # On startup
+    started_at = time.perf_counter()
     logger.info("Application startup...")
     setup_logging()
     async with AsyncSessionLocal() as db:
         await seed_initial_data(db)
+    seeded_at = time.perf_counter()
+    for method, path, permission in compile_route_permissions(app.routes):
+        logger.warning(
+            f"Route {method} {path} requires '{permission}', which is not defined in AppPermissions."
+        )
+    # Payment providers start on their first call, see ProviderRegistry.
+    await webhook_processor.start()
+    finished_at = time.perf_counter()
+    app_startup_seconds.set(seeded_at - started_at, "seed")
+    app_startup_seconds.set(finished_at - seeded_at, "routes_and_workers")
+    app_startup_seconds.set(finished_at - started_at, "total")
+    logger.info(f"Application startup complete in {(finished_at - started_at) * 1000:.1f} ms.")
     yield
     # On shutdown
     logger.info("Application shutdown...")
+    await webhook_processor.stop()
+    await payment_providers.shutdown()
+    await read_replicas.dispose()
     await engine.dispose()
 
 app = FastAPI(
     title="Scalable FastAPI Template",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     # ... other app config
 )
 
 setup_exception_handlers(app)
+app.add_middleware(MetricsMiddleware)
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(RequestIdMiddleware)  # Outermost, so the other middleware log with the id
 
 # Auth routes
 app.include_router(
@@ -54,7 +83,7 @@ app.include_router(
 )
 # User management by admins (optional, if you want admins to manage users)
 app.include_router(
-    fastapi_users.get_users_router(UserRead, UserUpdate),
+    fastapi_users_with_roles.get_users_router(UserRead, UserUpdate),
     prefix="/api/v1/users",
     tags=["Users"],
 )
@@ -62,5 +91,7 @@ app.include_router(
 # Custom routers
 app.include_router(rbac.router, prefix="/api/v1/rbac", tags=["RBAC Management"])
 app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
+app.include_router(exports.router, prefix="/api/v1/admin/exports", tags=["Admin"])
 app.include_router(profiles.router, prefix="/api/v1/profiles", tags=["Profiles"])
-app.include_router(payment_router, prefix="/api/v1/payments", tags=["Payments"])
\ No newline at end of file
+app.include_router(payment_router, prefix="/api/v1/payments", tags=["Payments"])
+app.include_router(metrics.router, tags=["Metrics"])
\ No newline at end of file
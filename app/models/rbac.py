@@ -1,5 +1,8 @@
-from sqlalchemy import Column, Integer, String, Table, ForeignKey, JSON
-from sqlalchemy.orm import relationship, Mapped, mapped_column
+from typing import Dict, Iterable, List
+
+from sqlalchemy import BigInteger, Column, Index, Integer, String, Table, ForeignKey, JSON, delete, event, insert, inspect
+from sqlalchemy.orm import relationship, validates, Mapped, mapped_column
+from app.core.permissions import permissions_to_mask
 from .base_class import Base
 
 # Association table for User <-> Role (many-to-many)
@@ -8,8 +11,28 @@ user_role_association = Table(
     Base.metadata,
     Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
     Column("role_id", Integer, ForeignKey("roles.id", ondelete="CASCADE"), primary_key=True),
+    # The primary key leads with user_id; this serves lookups by role.
+    Index("ix_user_role_association_role_id_user_id", "role_id", "user_id"),
+)
+
+# Normalized copy of Role.permissions for reverse lookups ("who holds X").
+# Kept in step by the Role mapper events below and by the bulk paths of CRUDRole.
+role_permissions = Table(
+    "role_permissions",
+    Base.metadata,
+    Column("role_id", Integer, ForeignKey("roles.id", ondelete="CASCADE"), primary_key=True),
+    Column("permission", String(100), primary_key=True),
+    Index("ix_role_permissions_permission_role_id", "permission", "role_id"),
 )
 
+
+def role_permission_rows(permissions_by_role: Dict[int, Iterable[str]]) -> List[Dict[str, object]]:
+    return [
+        {"role_id": role_id, "permission": permission}
+        for role_id, permissions in permissions_by_role.items()
+        for permission in dict.fromkeys(permissions or [])
+    ]
+
 class Role(Base):
     __tablename__ = "roles"
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -17,5 +40,40 @@ class Role(Base):
     description: Mapped[str] = mapped_column(String, nullable=True)
     
     permissions: Mapped[list[str]] = mapped_column(JSON, default=[], server_default="[]")
+    # Compiled form of `permissions`, see app.core.permissions.PERMISSION_BITS.
+    permission_mask: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0", nullable=False)
     
-    users = relationship("User", secondary=user_role_association, back_populates="roles", lazy="selectin")
\ No newline at end of file
+    # Never loaded implicitly: a popular role can be held by millions of users.
+    users = relationship("User", secondary=user_role_association, back_populates="roles", lazy="raise")
+
+    @validates("permissions")
+    def _compile_permission_mask(self, key, permissions):
+        self.permission_mask = permissions_to_mask(permissions or [])
+        return permissions
+
+
+@event.listens_for(Role, "after_insert")
+def _insert_role_permissions(mapper, connection, role: Role):
+    rows = role_permission_rows({role.id: role.permissions})
+    if rows:
+        connection.execute(insert(role_permissions), rows)
+
+
+@event.listens_for(Role, "after_update")
+def _replace_role_permissions(mapper, connection, role: Role):
+    if not inspect(role).attrs.permissions.history.has_changes():
+        return
+    connection.execute(delete(role_permissions).where(role_permissions.c.role_id == role.id))
+    _insert_role_permissions(mapper, connection, role)
+
+
+@event.listens_for(Role, "before_delete")
+def _delete_role_permissions(mapper, connection, role: Role):
+    # Not left to ON DELETE CASCADE, which SQLite only honours with foreign keys on.
+    connection.execute(delete(role_permissions).where(role_permissions.c.role_id == role.id))
+
+
+@event.listens_for(Role, "before_delete")
+def _delete_role_assignments(mapper, connection, role: Role):
+    # `Role.users` is never loaded, so the unit of work cannot clear its rows itself.
+    connection.execute(delete(user_role_association).where(user_role_association.c.role_id == role.id))
@@ -0,0 +1,14 @@
+from datetime import datetime
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base_class import Base
+
+
+class SeedState(Base):
+    """Fingerprint of the last seed applied, so worker boots can skip seeding."""
+    __tablename__ = "seed_state"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    applied_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
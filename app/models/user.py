@@ -1,4 +1,5 @@
 from fastapi_users_db_sqlalchemy import SQLAlchemyBaseUserTable
+from sqlalchemy import Integer, delete, event
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from .base_class import Base
 from .rbac import user_role_association
@@ -6,6 +7,18 @@ from .rbac import user_role_association
 class User(SQLAlchemyBaseUserTable[int], Base):
     __tablename__ = "users"
     id: Mapped[int] = mapped_column(primary_key=True)
+
+    # Bumped whenever the user's effective grants change, so tokens carrying
+    # permission claims can detect that they are stale.
+    role_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
     
-    # Add the many-to-many relationship to Role
-    roles = relationship("Role", secondary=user_role_association, back_populates="users", lazy="selectin")
\ No newline at end of file
+    # Add the many-to-many relationship to Role.
+    # Loading is chosen per query, e.g. `options(selectinload(User.roles))`.
+    roles = relationship("Role", secondary=user_role_association, back_populates="users", lazy="raise")
+
+
+@event.listens_for(User, "before_delete")
+def _delete_user_assignments(mapper, connection, user: User):
+    # `User.roles` is not loaded on delete, and SQLite ignores ON DELETE CASCADE
+    # without the foreign key pragma.
+    connection.execute(delete(user_role_association).where(user_role_association.c.user_id == user.id))
@@ -0,0 +1,10 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class BatchDelete(BaseModel):
+    ids: List[int]
+
+class BatchResult(BaseModel):
+    count: int
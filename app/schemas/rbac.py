@@ -30,9 +30,26 @@ class RoleUpdate(BaseModel):
                     raise ValueError(f"Invalid permission: {permission}")
         return v
 
+class RoleBatchUpdate(RoleUpdate):
+    id: int
+
 class RoleRead(RoleBase):
     id: int
     permissions: List[str] = []
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        from_attributes = True
+
+class PermissionHolder(BaseModel):
+    id: int
+    email: str
+
+    class Config:
+        from_attributes = True
+
+# --- Assignment Schemas ---
+class UserIds(BaseModel):
+    user_ids: List[int]
+
+class RoleIds(BaseModel):
+    role_ids: List[int]
@@ -1,11 +1,36 @@
+from typing import Annotated, Optional
+
 from fastapi_users import schemas
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from .rbac import RoleRead
 
 class UserRead(schemas.BaseUser[int]):
+    # Emails were validated on the way in; re-validating every row of a list
+    # response through email-validator cost more than the rest of serialization.
+    email: Annotated[str, Field(json_schema_extra={"format": "email"})]
     roles: list[RoleRead] = []
 
 class UserCreate(schemas.BaseUserCreate):
     pass
 
 class UserUpdate(schemas.BaseUserUpdate):
-    pass
\ No newline at end of file
+    pass
+
+# The batch endpoints only require users:manage, so they cannot make a user a
+# superuser or mark an email verified; that stays with the superuser-only
+# /users routes. Unknown fields are rejected rather than silently dropped.
+
+class UserBatchCreate(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    email: EmailStr
+    password: str
+    is_active: bool = True
+
+class UserBatchUpdate(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    id: int
+    email: Optional[EmailStr] = None
+    password: Optional[str] = None
+    is_active: Optional[bool] = None
@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.exceptions import IdempotencyKeyInProgressException, IdempotencyKeyReusedException
+from app.services.payment.models import IdempotencyKey
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    status_code: int
+    body: Any
+    fingerprint: str
+
+
+def request_fingerprint(payload: Dict[str, Any]) -> str:
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Replays the stored response for a repeated (user, Idempotency-Key).
+
+    Lookups go to an in-process TTL cache first, then to the idempotency_keys
+    table. Concurrent duplicates in this process wait on the first request;
+    a duplicate arriving at another process while the first is still running
+    sees the unfinished claim row and gets a 409.
+
+    The handler must not commit: its writes are committed together with the
+    stored response, so a claim that is taken over after a crash never has a
+    committed result behind it.
+    """
+
+    def __init__(self, cache: TTLCache[StoredResponse]):
+        self.cache = cache
+        self._in_flight: Dict[Hashable, "asyncio.Future[StoredResponse]"] = {}
+
+    async def run(
+        self, db: AsyncSession, *, user_id: int, key: str, fingerprint: str,
+        handler: Callable[[], Awaitable[Tuple[int, Any]]],
+    ) -> StoredResponse:
+        cache_key = (user_id, key)
+        while True:
+            stored = self.cache.get(cache_key)
+            if stored is not None:
+                return self._check(stored, fingerprint)
+            in_flight = self._in_flight.get(cache_key)
+            if in_flight is None:
+                break
+            try:
+                return self._check(await asyncio.shield(in_flight), fingerprint)
+            except asyncio.CancelledError:
+                if not in_flight.cancelled():
+                    raise
+                # The first request was cancelled; take over from it.
+
+        future: "asyncio.Future[StoredResponse]" = asyncio.get_running_loop().create_future()
+        self._in_flight[cache_key] = future
+        try:
+            stored = await self._execute(db, user_id=user_id, key=key, fingerprint=fingerprint, handler=handler)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # Retrieved here so an unawaited failure is not logged twice.
+            raise
+        else:
+            self.cache.set(cache_key, stored)
+            future.set_result(stored)
+        finally:
+            del self._in_flight[cache_key]
+        return self._check(stored, fingerprint)
+
+    async def _execute(
+        self, db: AsyncSession, *, user_id: int, key: str, fingerprint: str,
+        handler: Callable[[], Awaitable[Tuple[int, Any]]],
+    ) -> StoredResponse:
+        claim_id = await self._claim(db, user_id=user_id, key=key, fingerprint=fingerprint)
+        if not isinstance(claim_id, int):
+            return claim_id
+        try:
+            status_code, body = await handler()
+            await self._store(db, claim_id=claim_id, status_code=status_code, body=body)
+            await db.commit()
+        except BaseException:
+            # Nothing of the handler's was committed; release the claim so the
+            # client can retry with the same key.
+            await db.rollback()
+            await db.execute(delete(IdempotencyKey).where(IdempotencyKey.id == claim_id))
+            await db.commit()
+            raise
+        return StoredResponse(status_code=status_code, body=body, fingerprint=fingerprint)
+
+    async def _store(self, db: AsyncSession, *, claim_id: int, status_code: int, body: Any) -> None:
+        """Writes the response onto the claim, in the handler's transaction."""
+        await db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == claim_id)
+            .values(status_code=status_code, response_body=body)
+        )
+
+    async def _claim(
+        self, db: AsyncSession, *, user_id: int, key: str, fingerprint: str
+    ) -> "int | StoredResponse":
+        """Returns the id of a newly claimed row, or the response already stored for the key."""
+        while True:
+            try:
+                claim_id = await db.scalar(
+                    insert(IdempotencyKey)
+                    .values(user_id=user_id, key=key, request_fingerprint=fingerprint, created_at=datetime.utcnow())
+                    .returning(IdempotencyKey.id)
+                )
+                await db.commit()
+                return claim_id
+            except IntegrityError:
+                await db.rollback()
+
+            row = await self._get(db, user_id=user_id, key=key)
+            if row is None:
+                continue  # Released between our insert and select.
+            if row.status_code is not None:
+                return StoredResponse(row.status_code, row.response_body, row.request_fingerprint)
+            abandoned_before = datetime.utcnow() - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS)
+            if row.created_at >= abandoned_before:
+                raise IdempotencyKeyInProgressException()
+            await db.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.id == row.id, IdempotencyKey.status_code.is_(None)
+                )
+            )
+            await db.commit()
+
+    async def _get(self, db: AsyncSession, *, user_id: int, key: str) -> Optional[Any]:
+        result = await db.execute(
+            select(
+                IdempotencyKey.id, IdempotencyKey.request_fingerprint,
+                IdempotencyKey.status_code, IdempotencyKey.response_body, IdempotencyKey.created_at,
+            ).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        )
+        return result.first()
+
+    @staticmethod
+    def _check(stored: StoredResponse, fingerprint: str) -> StoredResponse:
+        if stored.fingerprint != fingerprint:
+            raise IdempotencyKeyReusedException()
+        return stored
+
+
+payment_idempotency = IdempotencyStore(
+    TTLCache(
+        max_size=settings.IDEMPOTENCY_CACHE_MAX_SIZE,
+        ttl_seconds=settings.IDEMPOTENCY_CACHE_TTL_SECONDS,
+    )
+)
@@ -1,11 +1,20 @@
 from datetime import datetime
-from sqlalchemy import JSON, DateTime, Float, Integer, String
+from sqlalchemy import JSON, DateTime, Float, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base_class import Base
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        # Keyset pagination: per-user listing and global listing. Their leading
+        # columns also serve plain user_id and created_at filters.
+        Index("ix_payments_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_payments_created_at_id", "created_at", "id"),
+        Index("ix_payments_status", "status"),
+        # Webhooks and batch verification look payments up by order.
+        Index("ix_payments_provider_order_id", "provider_order_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer)
@@ -18,4 +27,38 @@ class Payment(Base):
     provider_data: Mapped[dict | None] = mapped_column(JSON)
     extra_metadata: Mapped[dict | None] = mapped_column(JSON)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) 
\ No newline at end of file
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class PaymentSummary(Base):
+    """
+    Per-user payment count and total by status and currency. Maintained by
+    PaymentRepository in the same transaction as every insert and status
+    change, so summaries never scan `payments`.
+    """
+    __tablename__ = "payment_summaries"
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    currency: Mapped[str] = mapped_column(String(3), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0)
+    total_amount: Mapped[float] = mapped_column(Float, default=0.0)
+
+
+class IdempotencyKey(Base):
+    """
+    One row per (user, Idempotency-Key). The row is claimed before the payment
+    is created; `status_code` and `response_body` stay NULL until it completes.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer)
+    key: Mapped[str] = mapped_column(String(255))
+    request_fingerprint: Mapped[str] = mapped_column(String(64))
+    status_code: Mapped[int | None] = mapped_column(Integer)
+    response_body: Mapped[dict | None] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -1,9 +1,32 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+
+
+@dataclass(frozen=True)
+class PaymentEvent:
+    """A payment status change reported by a provider webhook."""
+    event_id: str
+    provider: str
+    order_id: str
+    payment_id: Optional[str]
+    status: str  # One of the Payment.status values: completed, failed, refunded
+
 
 class PaymentProvider(ABC):
     """Base class for all payment providers"""
 
+    # Providers that push status changes set this and implement the two webhook methods.
+    supports_webhooks = False
+
+    async def start(self) -> None:
+        """Open pooled resources (HTTP sessions, worker threads). Called once per process."""
+        pass
+
+    async def close(self) -> None:
+        """Release the resources opened by `start`."""
+        pass
+
     @abstractmethod
     async def create_order(self, amount: int, currency: str, **kwargs) -> Dict[str, Any]:
         """Create a payment order"""
@@ -22,4 +45,12 @@ class PaymentProvider(ABC):
     @abstractmethod
     async def refund_payment(self, payment_id: str, amount: int) -> Dict[str, Any]:
         """Refund payment"""
-        pass 
\ No newline at end of file
+        pass
+
+    def verify_webhook_signature(self, body: bytes, headers: Mapping[str, str]) -> bool:
+        """Check that a webhook body was signed by the provider"""
+        return False
+
+    def parse_webhook_event(self, body: bytes, headers: Mapping[str, str]) -> Optional[PaymentEvent]:
+        """Translate a verified webhook into a PaymentEvent, or None if it is not a status change"""
+        return None
@@ -1,14 +1,95 @@
-import razorpay
-from typing import Dict, Any
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional
 
-from .base import PaymentProvider
+from .base import PaymentEvent, PaymentProvider
 from app.core.config import settings
+from app.core.metrics import payment_provider_request_duration_seconds
+
+if TYPE_CHECKING:
+    import razorpay
+
+# Webhook event -> Payment.status it moves the payment to.
+WEBHOOK_EVENT_STATUSES = {
+    "payment.captured": "completed",
+    "order.paid": "completed",
+    "payment.failed": "failed",
+    "refund.processed": "refunded",
+}
 
 class RazorpayProvider(PaymentProvider):
+    """
+    Razorpay's SDK is synchronous, so every HTTP call runs on a bounded
+    worker pool sharing one keep-alive session; the event loop only awaits.
+    The SDK (and requests) is imported by `start`, on the first API call,
+    so processes that never call Razorpay do not pay for the import.
+    """
+
+    supports_webhooks = True
+
     def __init__(self):
+        self.client: Optional["razorpay.Client"] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.timeout = settings.PAYMENT_PROVIDER_TIMEOUT_SECONDS
+        # HMAC keys are encoded once; signature checks never touch the SDK.
+        self._key_secret = settings.RAZORPAY_KEY_SECRET.encode() if settings.RAZORPAY_KEY_SECRET else None
+        secret = settings.RAZORPAY_WEBHOOK_SECRET
+        self._webhook_key = secret.encode() if secret else None
+
+    async def start(self) -> None:
+        if self.client is not None:
+            return
+        import razorpay
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        workers = settings.PAYMENT_PROVIDER_MAX_WORKERS
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        options = {"base_url": settings.RAZORPAY_BASE_URL} if settings.RAZORPAY_BASE_URL else {}
         self.client = razorpay.Client(
-            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
+            session=session,
+            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+            **options,
         )
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="razorpay")
+
+    async def close(self) -> None:
+        if self.client is None:
+            return
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.client.session.close()
+        self.client = None
+        self._executor = None
+
+    async def _call(self, resource: str, method: str, *args: Any) -> Any:
+        """Runs `client.<resource>.<method>(*args)` on the worker pool."""
+        await self.start()
+        func = getattr(getattr(self.client, resource), method)
+        # `timeout` bounds the socket inside the worker; wait_for bounds the
+        # caller, including time spent queued for a free worker.
+        call = partial(func, *args, timeout=self.timeout)
+        loop = asyncio.get_running_loop()
+        outcome = "error"
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(loop.run_in_executor(self._executor, call), self.timeout)
+            outcome = "ok"
+            return result
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise TimeoutError(f"Razorpay did not respond within {self.timeout}s") from None
+        finally:
+            payment_provider_request_duration_seconds.observe(
+                time.perf_counter() - start, "razorpay", f"{resource}.{method}", outcome
+            )
 
     async def create_order(self, amount: int, currency: str = "INR", **kwargs) -> Dict[str, Any]:
         order_data = {
@@ -18,7 +99,7 @@ class RazorpayProvider(PaymentProvider):
             "notes": kwargs.get("notes", {})
         }
         try:
-            order = self.client.order.create(order_data)
+            order = await self._call("order", "create", order_data)
             return {
                 "success": True,
                 "order_id": order["id"],
@@ -29,20 +110,28 @@ class RazorpayProvider(PaymentProvider):
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    def verify_payment_signature(self, order_id: str, payment_id: str, signature: str) -> bool:
+        """Razorpay signs `order_id|payment_id` with the key secret (HMAC-SHA256, hex)."""
+        if self._key_secret is None:
+            return False
+        message = f"{order_id}|{payment_id}".encode()
+        expected = hmac.new(self._key_secret, message, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected.encode(), signature.encode())
+
     async def verify_payment(self, payment_data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            self.client.utility.verify_payment_signature({
-                "razorpay_order_id": payment_data["order_id"],
-                "razorpay_payment_id": payment_data["payment_id"],
-                "razorpay_signature": payment_data["signature"]
-            })
-            return {"success": True, "verified": True}
-        except Exception as e:
-            return {"success": False, "verified": False, "error": str(e)}
+            verified = self.verify_payment_signature(
+                payment_data["order_id"], payment_data["payment_id"], payment_data["signature"]
+            )
+        except KeyError as e:
+            return {"success": False, "verified": False, "error": f"Missing {e}"}
+        if not verified:
+            return {"success": False, "verified": False, "error": "Razorpay Signature Verification Failed"}
+        return {"success": True, "verified": True}
 
     async def capture_payment(self, payment_id: str, amount: int) -> Dict[str, Any]:
         try:
-            result = self.client.payment.capture(payment_id, amount * 100)
+            result = await self._call("payment", "capture", payment_id, amount * 100)
             return {"success": True, "captured": True, "provider_data": result}
         except Exception as e:
             return {"success": False, "captured": False, "error": str(e)}
@@ -50,7 +139,30 @@ class RazorpayProvider(PaymentProvider):
     async def refund_payment(self, payment_id: str, amount: int) -> Dict[str, Any]:
         try:
             refund_data = {"amount": amount * 100, "notes": {"reason": "requested_by_customer"}}
-            result = self.client.payment.refund(payment_id, refund_data)
+            result = await self._call("payment", "refund", payment_id, refund_data)
             return {"success": True, "refund_id": result["id"], "provider_data": result}
         except Exception as e:
-            return {"success": False, "error": str(e)} 
\ No newline at end of file
+            return {"success": False, "error": str(e)}
+
+    def verify_webhook_signature(self, body: bytes, headers: Mapping[str, str]) -> bool:
+        signature = headers.get("x-razorpay-signature")
+        if self._webhook_key is None or not signature:
+            return False
+        expected = hmac.new(self._webhook_key, body, hashlib.sha256).hexdigest()
+        # Bytes, since compare_digest rejects non-ASCII str from the header.
+        return hmac.compare_digest(expected.encode(), signature.encode())
+
+    def parse_webhook_event(self, body: bytes, headers: Mapping[str, str]) -> Optional[PaymentEvent]:
+        data = json.loads(body)
+        status = WEBHOOK_EVENT_STATUSES.get(data.get("event"))
+        payment = data.get("payload", {}).get("payment", {}).get("entity", {})
+        if status is None or not payment.get("order_id"):
+            return None
+        return PaymentEvent(
+            # Razorpay sends the same event id on every retry of a delivery.
+            event_id=headers.get("x-razorpay-event-id") or f"{data['event']}:{payment.get('id')}",
+            provider="razorpay",
+            order_id=payment["order_id"],
+            payment_id=payment.get("id"),
+            status=status,
+        )
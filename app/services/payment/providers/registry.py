@@ -0,0 +1,43 @@
+from typing import Callable, Dict, Optional
+
+from .base import PaymentProvider
+from .razorpay import RazorpayProvider
+from .simulated import SimulatedProvider
+# from .stripe import StripeProvider # Future provider
+
+
+class ProviderRegistry:
+    """
+    Holds one provider instance per process so HTTP sessions and worker
+    pools are shared across requests. Closed by the app lifespan.
+    """
+
+    def __init__(self, factories: Dict[str, Callable[[], PaymentProvider]]):
+        self._factories = factories
+        self._providers: Dict[str, PaymentProvider] = {}
+
+    def get(self, name: str) -> Optional[PaymentProvider]:
+        provider = self._providers.get(name)
+        if provider is None and name in self._factories:
+            provider = self._providers[name] = self._factories[name]()
+        return provider
+
+    async def startup(self) -> None:
+        """
+        Starts every provider eagerly, e.g. to warm pools before traffic. The
+        app does not call this: providers start on their first API call.
+        """
+        for name in self._factories:
+            await self.get(name).start()
+
+    async def shutdown(self) -> None:
+        for provider in self._providers.values():
+            await provider.close()
+        self._providers.clear()
+
+
+payment_providers = ProviderRegistry({
+    "razorpay": RazorpayProvider,
+    "simulated": SimulatedProvider,
+    # "stripe": StripeProvider,  # Add when needed
+})
@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import math
+import random
+import time
+import uuid
+from typing import Any, Dict, Mapping, Optional
+
+from .base import PaymentEvent, PaymentProvider
+from app.core.config import settings
+from app.core.metrics import payment_provider_request_duration_seconds
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+# Webhook event -> Payment.status it moves the payment to.
+WEBHOOK_EVENT_STATUSES = {
+    "payment.captured": "completed",
+    "payment.failed": "failed",
+    "refund.processed": "refunded",
+}
+
+
+class SimulatedProviderError(Exception):
+    """An injected gateway failure."""
+
+
+class SimulatedProvider(PaymentProvider):
+    """
+    An in-process stand-in for a payment gateway, for load and capacity tests.
+    Order creation, capture and refund wait for a sampled latency and fail or
+    hang at the configured rates; calls share a pool of
+    PAYMENT_PROVIDER_MAX_WORKERS slots and are bounded by
+    PAYMENT_PROVIDER_TIMEOUT_SECONDS, like the Razorpay provider, so queuing
+    and timeouts show up the same way. Signatures use Razorpay's scheme
+    (HMAC-SHA256 of `order_id|payment_id`) keyed by SIMULATED_PROVIDER_SECRET;
+    without a secret nothing verifies. Select it with
+    DEFAULT_PAYMENT_PROVIDER=simulated.
+    """
+
+    name = "simulated"
+    supports_webhooks = True
+
+    def __init__(self):
+        if settings.SIMULATED_PROVIDER_LATENCY_DISTRIBUTION not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"SIMULATED_PROVIDER_LATENCY_DISTRIBUTION must be one of {', '.join(LATENCY_DISTRIBUTIONS)}"
+            )
+        self.distribution = settings.SIMULATED_PROVIDER_LATENCY_DISTRIBUTION
+        self.latency = settings.SIMULATED_PROVIDER_LATENCY_MS / 1000
+        self.jitter = settings.SIMULATED_PROVIDER_JITTER_MS / 1000
+        self.error_rate = settings.SIMULATED_PROVIDER_ERROR_RATE
+        self.timeout_rate = settings.SIMULATED_PROVIDER_TIMEOUT_RATE
+        self.timeout = settings.PAYMENT_PROVIDER_TIMEOUT_SECONDS
+        self.random = random.Random(settings.SIMULATED_PROVIDER_SEED)
+        secret = settings.SIMULATED_PROVIDER_SECRET
+        self._key = secret.encode() if secret else None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def start(self) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(settings.PAYMENT_PROVIDER_MAX_WORKERS)
+
+    async def close(self) -> None:
+        self._slots = None
+
+    def sample_latency(self) -> float:
+        """Seconds for one call. `lognormal` has its median at the latency and a spread of jitter/latency."""
+        if self.distribution == "uniform":
+            value = self.random.uniform(self.latency - self.jitter, self.latency + self.jitter)
+        elif self.distribution == "normal":
+            value = self.random.gauss(self.latency, self.jitter)
+        elif self.distribution == "lognormal" and self.latency > 0:
+            value = self.random.lognormvariate(math.log(self.latency), self.jitter / self.latency)
+        else:
+            value = self.latency
+        return max(value, 0.0)
+
+    async def _respond(self, operation: str, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Waits like a gateway round trip, then returns `response` or fails as configured."""
+        await self.start()
+        roll = self.random.random()
+        # A hung call outlasts the timeout below, as does any slower sample.
+        delay = self.timeout + 1 if roll < self.timeout_rate else self.sample_latency()
+        failed = self.timeout_rate <= roll < self.timeout_rate + self.error_rate
+
+        async def call():
+            async with self._slots:
+                await asyncio.sleep(delay)
+
+        outcome = "error"
+        start = time.perf_counter()
+        try:
+            # Bounds the caller, including time spent queued for a free slot.
+            await asyncio.wait_for(call(), self.timeout)
+            if failed:
+                raise SimulatedProviderError(f"Simulated {operation} failure")
+            outcome = "ok"
+            return response
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise TimeoutError(f"Simulated provider did not respond within {self.timeout}s") from None
+        finally:
+            payment_provider_request_duration_seconds.observe(
+                time.perf_counter() - start, self.name, operation, outcome
+            )
+
+    def _new_id(self, prefix: str) -> str:
+        # Random, like a gateway's, so ids stay unique across restarts and processes.
+        return f"{prefix}_{uuid.uuid4().hex[:14]}"
+
+    async def create_order(self, amount: int, currency: str = "INR", **kwargs) -> Dict[str, Any]:
+        order = {
+            "id": self._new_id("order"),
+            "entity": "order",
+            "amount": amount * 100,
+            "currency": currency,
+            "receipt": kwargs.get("receipt", f"order_{kwargs.get('order_id', 'unknown')}"),
+            "notes": kwargs.get("notes", {}),
+            "status": "created",
+        }
+        try:
+            await self._respond("order.create", order)
+            return {
+                "success": True,
+                "order_id": order["id"],
+                "amount": order["amount"],
+                "currency": order["currency"],
+                "provider_data": order
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def sign(self, order_id: str, payment_id: str) -> str:
+        """The signature a client would receive for a payment, for generating test traffic."""
+        if self._key is None:
+            raise ValueError("SIMULATED_PROVIDER_SECRET is not set")
+        return hmac.new(self._key, f"{order_id}|{payment_id}".encode(), hashlib.sha256).hexdigest()
+
+    def verify_payment_signature(self, order_id: str, payment_id: str, signature: str) -> bool:
+        if self._key is None:
+            return False
+        return hmac.compare_digest(self.sign(order_id, payment_id).encode(), signature.encode())
+
+    async def verify_payment(self, payment_data: Dict[str, Any]) -> Dict[str, Any]:
+        # Local, like Razorpay's check, so it has no latency or injected failures.
+        try:
+            verified = self.verify_payment_signature(
+                payment_data["order_id"], payment_data["payment_id"], payment_data["signature"]
+            )
+        except KeyError as e:
+            return {"success": False, "verified": False, "error": f"Missing {e}"}
+        if not verified:
+            return {"success": False, "verified": False, "error": "Simulated Signature Verification Failed"}
+        return {"success": True, "verified": True}
+
+    async def capture_payment(self, payment_id: str, amount: int) -> Dict[str, Any]:
+        try:
+            result = await self._respond("payment.capture", {
+                "id": payment_id, "entity": "payment", "amount": amount * 100, "status": "captured",
+            })
+            return {"success": True, "captured": True, "provider_data": result}
+        except Exception as e:
+            return {"success": False, "captured": False, "error": str(e)}
+
+    async def refund_payment(self, payment_id: str, amount: int) -> Dict[str, Any]:
+        try:
+            result = await self._respond("payment.refund", {
+                "id": self._new_id("rfnd"), "entity": "refund", "payment_id": payment_id,
+                "amount": amount * 100, "status": "processed",
+            })
+            return {"success": True, "refund_id": result["id"], "provider_data": result}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def verify_webhook_signature(self, body: bytes, headers: Mapping[str, str]) -> bool:
+        signature = headers.get("x-simulated-signature")
+        if self._key is None or not signature:
+            return False
+        expected = hmac.new(self._key, body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected.encode(), signature.encode())
+
+    def parse_webhook_event(self, body: bytes, headers: Mapping[str, str]) -> Optional[PaymentEvent]:
+        # {"event": "payment.captured", "id": "...", "order_id": "...", "payment_id": "..."}
+        data = json.loads(body)
+        status = WEBHOOK_EVENT_STATUSES.get(data.get("event"))
+        if status is None or not data.get("order_id"):
+            return None
+        return PaymentEvent(
+            event_id=data.get("id") or f"{data['event']}:{data.get('payment_id')}",
+            provider=self.name,
+            order_id=data["order_id"],
+            payment_id=data.get("payment_id"),
+            status=status,
+        )
@@ -0,0 +1,166 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import Row, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.crud.pagination import Page, paginate
+from app.services.payment.models import Payment, PaymentSummary
+
+
+class StatusChange(NamedTuple):
+    user_id: int
+    currency: str
+    amount: float
+    old_status: Optional[str]  # None for a new payment
+    new_status: str
+
+
+class PaymentRepository:
+    """
+    Data access for payments. Writes use INSERT/UPDATE ... RETURNING and hand
+    back the written row, so callers never re-read what they just wrote. The
+    rows are plain Rows rather than ORM instances, so they remain readable
+    after the caller commits. Transactions are left to the caller.
+
+    Every write also adjusts `payment_summaries`. Status updates take the
+    Payment as loaded by the caller to know the previous status, so callers
+    that change a status load it with `for_update=True`.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.table = Payment.__table__
+
+    async def get(self, payment_id: int, for_update: bool = False) -> Optional[Payment]:
+        return await self.db.get(Payment, payment_id, with_for_update=for_update)
+
+    async def list(self, user_id: int = None, skip: int = 0, limit: int = 100) -> List[Payment]:
+        query = select(Payment)
+        if user_id:
+            query = query.filter(Payment.user_id == user_id)
+        query = query.offset(skip).limit(limit)
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def page(
+        self, user_id: int = None, limit: int = 100,
+        after: Optional[str] = None, before: Optional[str] = None
+    ) -> Page[Payment]:
+        query = select(Payment)
+        if user_id:
+            query = query.filter(Payment.user_id == user_id)
+        return await paginate(
+            self.db, query, key_columns=(Payment.created_at, Payment.id),
+            limit=limit, after=after, before=before
+        )
+
+    async def find_by_orders(
+        self, order_ids: Sequence[str], user_id: int = None, for_update: bool = False
+    ) -> List[Payment]:
+        query = select(Payment).filter(Payment.provider_order_id.in_(order_ids))
+        if user_id:
+            query = query.filter(Payment.user_id == user_id)
+        if for_update:
+            query = query.order_by(Payment.id).with_for_update()
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def insert(self, **values: Any) -> Row:
+        result = await self.db.execute(insert(self.table).values(**values).returning(self.table))
+        payment = result.one()
+        await self.apply_status_changes([
+            StatusChange(payment.user_id, payment.currency, payment.amount, None, payment.status)
+        ])
+        return payment
+
+    async def update(self, payment: Payment, **values: Any) -> Optional[Row]:
+        result = await self.db.execute(
+            update(self.table).where(self.table.c.id == payment.id).values(**values).returning(self.table)
+        )
+        row = result.one_or_none()
+        if row is not None:
+            await self.apply_status_changes([
+                StatusChange(payment.user_id, payment.currency, payment.amount, payment.status, row.status)
+            ])
+        return row
+
+    async def update_many(self, updates: Sequence[Dict[str, Any]], payments: Mapping[int, Payment]) -> None:
+        """
+        Partial updates by primary key, each dict holding `id`, in one executemany.
+        `payments` maps those ids to the loaded instances. Each id may appear
+        once: its summary change is computed from the loaded status.
+        """
+        changes = []  # Collected first: the bulk update refreshes the loaded instances.
+        for values in updates:
+            if "status" in values:
+                payment = payments[values["id"]]
+                changes.append(
+                    StatusChange(payment.user_id, payment.currency, payment.amount, payment.status, values["status"])
+                )
+        await self.db.execute(update(Payment), updates)
+        await self.apply_status_changes(changes)
+
+    async def apply_status_changes(self, changes: Iterable[StatusChange]) -> None:
+        """Folds the changes into per-key deltas and upserts them, in one statement on PostgreSQL and SQLite."""
+        deltas: Dict[Tuple[int, str, str], List[float]] = defaultdict(lambda: [0, 0.0])
+        for change in changes:
+            if change.old_status == change.new_status:
+                continue
+            if change.old_status is not None:
+                delta = deltas[(change.user_id, change.old_status, change.currency)]
+                delta[0] -= 1
+                delta[1] -= change.amount
+            delta = deltas[(change.user_id, change.new_status, change.currency)]
+            delta[0] += 1
+            delta[1] += change.amount
+        # Sorted, so concurrent transactions lock summary rows in the same order.
+        rows = [
+            {"user_id": user_id, "status": status, "currency": currency, "count": count, "total_amount": total}
+            for (user_id, status, currency), (count, total) in sorted(deltas.items())
+            if count or total
+        ]
+        if not rows:
+            return
+        summaries = PaymentSummary.__table__
+        dialect = self.db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert_ = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            statement = insert_(summaries).values(rows)
+            statement = statement.on_conflict_do_update(
+                index_elements=[summaries.c.user_id, summaries.c.status, summaries.c.currency],
+                set_={
+                    "count": summaries.c.count + statement.excluded.count,
+                    "total_amount": summaries.c.total_amount + statement.excluded.total_amount,
+                },
+            )
+            await self.db.execute(statement)
+            return
+        # Elsewhere, update each key and insert the ones that had no row. Two
+        # transactions inserting the same new key conflict on its unique index.
+        for row in rows:
+            result = await self.db.execute(
+                update(summaries)
+                .where(
+                    summaries.c.user_id == row["user_id"],
+                    summaries.c.status == row["status"],
+                    summaries.c.currency == row["currency"],
+                )
+                .values(
+                    count=summaries.c.count + row["count"],
+                    total_amount=summaries.c.total_amount + row["total_amount"],
+                )
+            )
+            if result.rowcount == 0:
+                await self.db.execute(insert(summaries).values(row))
+
+    async def summary(self, user_id: int) -> List[PaymentSummary]:
+        result = await self.db.execute(
+            select(PaymentSummary)
+            .filter(PaymentSummary.user_id == user_id, PaymentSummary.count > 0)
+            .order_by(PaymentSummary.status, PaymentSummary.currency)
+        )
+        return result.scalars().all()
+
@@ -1,70 +1,141 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import Annotated, List, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import current_active_user, AutoPermission
+from app.api.deps import AutoPermission, Principal, current_principal, get_read_db
+from app.api.pagination import set_page_headers
+from app.api.serialization import model_response
 from app.core.permissions import AppPermissions
 from app.db.session import get_db
-from app.models.user import User
+from app.services.payment.idempotency import payment_idempotency, request_fingerprint
+from app.services.payment.providers.registry import payment_providers
+from app.services.payment.webhooks import webhook_processor
 from app.services.payment.service import PaymentService
-from app.services.payment.schemas import PaymentRead, PaymentCreate, PaymentVerify, PaymentRefund
+from app.services.payment.schemas import (
+    PaymentRead, PaymentCreate, PaymentVerify, PaymentVerifyResult, PaymentRefund, PaymentSummaryRead,
+)
 
 router = APIRouter()
 
 @router.post(
     "/",
     response_model=PaymentRead,
-    dependencies=[Depends(AutoPermission(override=AppPermissions.PAYMENTS_CREATE))],
     status_code=status.HTTP_201_CREATED,
 )
 async def create_new_payment(
     payment_in: PaymentCreate,
-    current_user: User = Depends(current_active_user),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key", max_length=255),
+    principal: Principal = Depends(AutoPermission(override=AppPermissions.PAYMENTS_CREATE)),
     db: AsyncSession = Depends(get_db),
 ):
-    """Create a new payment."""
+    """
+    Create a new payment.
+    Send an `Idempotency-Key` header to make retries safe: repeating a request
+    with the same key returns the original response without creating another
+    order at the provider.
+    """
+    user_id = principal.id
     payment_service = PaymentService(db)
-    payment_data = await payment_service.create_payment(
-        user_id=current_user.id,
-        amount=payment_in.amount,
-        currency=payment_in.currency,
-        metadata=payment_in.metadata,
+
+    async def create(commit: bool = True):
+        payment_data = await payment_service.create_payment(
+            user_id=user_id,
+            amount=payment_in.amount,
+            currency=payment_in.currency,
+            metadata=payment_in.metadata,
+            commit=commit,
+        )
+        # The written row comes back from INSERT ... RETURNING; no re-fetch needed.
+        return payment_data["payment"]
+
+    if idempotency_key is None:
+        return await create()
+
+    async def create_and_encode():
+        # Committed by the idempotency store, together with the stored response.
+        payment = await create(commit=False)
+        return status.HTTP_201_CREATED, jsonable_encoder(PaymentRead.model_validate(payment, from_attributes=True))
+
+    stored = await payment_idempotency.run(
+        db,
+        user_id=user_id,
+        key=idempotency_key,
+        fingerprint=request_fingerprint(payment_in.model_dump()),
+        handler=create_and_encode,
+    )
+    return JSONResponse(stored.body, status_code=stored.status_code)
+
+
+@router.post("/webhooks/{provider}")
+async def receive_provider_webhook(provider: str, request: Request):
+    """
+    Receive payment status webhooks. Authenticated by the provider's signature;
+    events are queued and applied in the background.
+    """
+    payment_provider = payment_providers.get(provider)
+    if not payment_provider:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Provider not found")
+    if not payment_provider.supports_webhooks:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Provider does not support webhooks")
+    body = await request.body()
+    if not payment_provider.verify_webhook_signature(body, request.headers):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid webhook signature")
+
+    event = payment_provider.parse_webhook_event(body, request.headers)
+    if event is not None and not await webhook_processor.submit(event):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Webhook queue is full",
+            headers={"Retry-After": "1"},
+        )
+    return {"status": "accepted"}
+
+
+@router.post(
+    "/verify-batch",
+    response_model=List[PaymentVerifyResult],
+)
+async def verify_payments_batch(
+    payments_in: Annotated[List[PaymentVerify], Body(max_length=1000)],
+    principal: Principal = Depends(AutoPermission(override=AppPermissions.PAYMENTS_CREATE)),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Verify many of the current user's payments in one transaction, e.g. when a
+    client reconciles after reconnecting. Payments are matched by `order_id`;
+    each one gets a result entry, unknown orders included.
+    """
+    payment_service = PaymentService(db)
+    return await payment_service.verify_payments(
+        principal.id, [payment_in.model_dump() for payment_in in payments_in]
     )
-    # The service returns a dict, but we want to return a Pydantic model
-    # We need to fetch the full payment object from the DB
-    full_payment = await payment_service.get_payment(payment_data["payment_id"])
-    if not full_payment:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Payment not found after creation")
-    return full_payment
 
 
 @router.post(
     "/{payment_id}/verify",
     response_model=PaymentRead,
-    dependencies=[Depends(AutoPermission(override=AppPermissions.PAYMENTS_CREATE))], # Re-using create perm for verify for simplicity
 )
 async def verify_existing_payment(
     payment_id: int,
     payment_verify_in: PaymentVerify,
-    current_user: User = Depends(current_active_user),
+    # Re-using create perm for verify for simplicity
+    principal: Principal = Depends(AutoPermission(override=AppPermissions.PAYMENTS_CREATE)),
     db: AsyncSession = Depends(get_db),
 ):
     """Verify an existing payment. Users can only verify their own payments."""
     payment_service = PaymentService(db)
-    payment = await payment_service.get_payment(payment_id)
+    payment = await payment_service.get_payment(payment_id, for_update=True)
 
-    if not payment or payment.user_id != current_user.id:
+    if not payment or payment.user_id != principal.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payment not found or not authorized")
     
-    verification_result = await payment_service.verify_payment(payment_id, payment_verify_in.model_dump())
+    verification_result = await payment_service.verify_payment(payment, payment_verify_in.model_dump())
     if not verification_result.get("success"):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=verification_result.get("error", "Payment verification failed"))
-    
-    updated_payment = await payment_service.get_payment(payment_id)
-    if not updated_payment:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Payment not found after verification")
-    return updated_payment
+    return verification_result["payment"]
 
 
 @router.get(
@@ -74,13 +145,39 @@ async def verify_existing_payment(
 async def list_current_user_payments(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(current_active_user),
-    db: AsyncSession = Depends(get_db),
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    principal: Principal = Depends(current_principal),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """List all payments for the current user."""
+    """
+    List all payments for the current user.
+    Keyset-paginated by (created_at, id): pass the `X-Next-Cursor` /
+    `X-Prev-Cursor` response headers back as `after` / `before`.
+    """
     payment_service = PaymentService(db)
-    payments = await payment_service.list_payments(user_id=current_user.id, skip=skip, limit=limit)
-    return payments
+    if skip:
+        payments = await payment_service.list_payments(user_id=principal.id, skip=skip, limit=limit)
+        return model_response(payments, List[PaymentRead])
+    page = await payment_service.page_payments(
+        user_id=principal.id, limit=limit, after=after, before=before
+    )
+    response = model_response(page.items, List[PaymentRead])
+    set_page_headers(response, page)
+    return response
+
+
+@router.get(
+    "/summary",
+    response_model=PaymentSummaryRead,
+)
+async def get_current_user_payment_summary(
+    principal: Principal = Depends(current_principal),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Payment counts and totals for the current user, by status and currency."""
+    payment_service = PaymentService(db)
+    return {"user_id": principal.id, "totals": await payment_service.get_summary(principal.id)}
 
 
 @router.get(
@@ -89,14 +186,14 @@ async def list_current_user_payments(
 )
 async def get_payment_by_id(
     payment_id: int,
-    current_user: User = Depends(current_active_user),
-    db: AsyncSession = Depends(get_db),
+    principal: Principal = Depends(current_principal),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get a specific payment by ID. Users can only view their own payments."""
     payment_service = PaymentService(db)
     payment = await payment_service.get_payment(payment_id)
 
-    if not payment or payment.user_id != current_user.id:
+    if not payment or payment.user_id != principal.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payment not found or not authorized")
     
     return payment
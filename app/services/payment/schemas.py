@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class PaymentBase(BaseModel):
     amount: float
@@ -12,6 +12,8 @@ class PaymentCreate(PaymentBase):
     pass
 
 class PaymentRead(PaymentBase):
+    # Stored as `extra_metadata`; `metadata` is reserved on SQLAlchemy models.
+    metadata: Optional[Dict[str, Any]] = Field(default=None, validation_alias="extra_metadata")
     id: int
     user_id: int
     status: str
@@ -34,6 +36,26 @@ class PaymentVerify(BaseModel):
     order_id: str
     signature: str
 
+class PaymentVerifyResult(BaseModel):
+    order_id: str
+    id: Optional[int] = None  # Our payment id; None when the order is unknown
+    status: Optional[str] = None
+    verified: bool
+    error: Optional[str] = None
+
+class PaymentStatusTotal(BaseModel):
+    status: str
+    currency: str
+    count: int
+    total_amount: float
+
+    class Config:
+        from_attributes = True
+
+class PaymentSummaryRead(BaseModel):
+    user_id: int
+    totals: List[PaymentStatusTotal]
+
 class PaymentRefund(BaseModel):
     amount: float
     reason: Optional[str] = None 
\ No newline at end of file
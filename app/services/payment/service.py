@@ -1,27 +1,40 @@
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 
 from app.core.config import settings
-from app.services.payment.models import Payment
-from app.services.payment.providers.razorpay import RazorpayProvider
-# from app.services.payment.providers.stripe import StripeProvider # Future provider
+from app.crud.pagination import Page
+from app.services.payment.models import Payment, PaymentSummary
+from app.services.payment.providers.registry import payment_providers
+from app.services.payment.repository import PaymentRepository
+
+# Payments that verification may still move to completed or failed.
+VERIFIABLE_STATUSES = ("pending", "failed")
 
 class PaymentService:
+    """
+    Payment operations. Methods that change a payment take the instance the
+    caller already loaded and return the written row, so an endpoint needs at
+    most one read and one write. Load with `for_update=True` before a status
+    change, so the per-user summaries see the current status.
+    """
+
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.providers = {
-            "razorpay": RazorpayProvider(),
-            # "stripe": StripeProvider(),  # Add when needed
-        }
+        self.payments = PaymentRepository(db)
+        self.providers = payment_providers
         self.default_provider = settings.DEFAULT_PAYMENT_PROVIDER or "razorpay"
 
     async def create_payment(
         self, user_id: int, amount: float, currency: str = "INR",
-        provider: str = None, metadata: Dict[str, Any] = None
+        provider: str = None, metadata: Dict[str, Any] = None, commit: bool = True
     ) -> Dict[str, Any]:
+        """
+        Creates the provider order and the pending payment. With `commit=False`
+        the caller commits, e.g. together with a stored idempotency response.
+        """
         provider_name = provider or self.default_provider
         payment_provider = self.providers.get(provider_name)
         if not payment_provider:
@@ -36,19 +49,18 @@ class PaymentService:
         if not order_data.get("success"):
             raise Exception(f"Failed to create order: {order_data.get('error')}")
 
-        payment = Payment(
+        payment = await self.payments.insert(
             user_id=user_id,
             amount=amount,
             currency=currency,
             provider=provider_name,
             provider_order_id=order_data["order_id"],
             provider_data=order_data["provider_data"],
-            metadata=metadata,
+            extra_metadata=metadata,
             status="pending"
         )
-        self.db.add(payment)
-        await self.db.commit()
-        await self.db.refresh(payment)
+        if commit:
+            await self.db.commit()
 
         return {
             "payment_id": payment.id,
@@ -56,14 +68,12 @@ class PaymentService:
             "amount": amount,
             "currency": currency,
             "provider": provider_name,
-            "provider_data": order_data["provider_data"]
+            "provider_data": order_data["provider_data"],
+            "payment": payment,
         }
 
-    async def verify_payment(self, payment_id: int, payment_data: Dict[str, Any]) -> Dict[str, Any]:
-        payment = await self.get_payment(payment_id)
-        if not payment:
-            return {"success": False, "error": "Payment not found"}
-
+    async def verify_payment(self, payment: Payment, payment_data: Dict[str, Any]) -> Dict[str, Any]:
+        payment_id = payment.id  # `payment` expires once the update commits
         provider = self.providers.get(payment.provider)
         if not provider:
             return {"success": False, "error": "Provider not found"}
@@ -71,23 +81,71 @@ class PaymentService:
         try:
             verification_result = await provider.verify_payment(payment_data)
             if verification_result.get("success") and verification_result.get("verified"):
-                await self.update_payment(payment_id, {
+                updated = await self.update_payment(payment, {
                     "status": "completed",
                     "provider_payment_id": payment_data["payment_id"],
                     "provider_data": {**payment.provider_data, **payment_data} if payment.provider_data else payment_data
                 })
-                return {"success": True, "status": "completed", "payment_id": payment_id}
+                return {"success": True, "status": "completed", "payment_id": payment_id, "payment": updated}
             else:
-                await self.update_payment(payment_id, {"status": "failed"})
+                await self.update_payment(payment, {"status": "failed"})
                 return {"success": False, "status": "failed", "error": verification_result.get("error")}
         except Exception as e:
-            await self.update_payment(payment_id, {"status": "failed"})
+            await self.db.rollback()
+            await self.update_payment(await self.get_payment(payment_id, for_update=True), {"status": "failed"})
             return {"success": False, "status": "failed", "error": str(e)}
 
-    async def refund_payment(self, payment_id: int, amount: float, reason: str = None) -> Dict[str, Any]:
-        payment = await self.get_payment(payment_id)
-        if not payment:
-            return {"success": False, "error": "Payment not found"}
+    async def verify_payments(self, user_id: int, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Verifies many payments of one user in a single transaction: one SELECT
+        for the orders, local signature checks, one executemany UPDATE.
+        Payments that are already settled keep their status. An order listed
+        more than once is checked in turn against the status the earlier
+        items left it in, and written once.
+        """
+        order_ids = {item["order_id"] for item in items}
+        loaded = await self.payments.find_by_orders(order_ids, user_id=user_id, for_update=True)
+        payments = {payment.provider_order_id: payment for payment in loaded}
+
+        now = datetime.utcnow()
+        results = []
+        updates: Dict[int, Dict[str, Any]] = {}  # One per payment, so its summary moves once
+        for item in items:
+            payment = payments.get(item["order_id"])
+            if not payment:
+                results.append({"order_id": item["order_id"], "verified": False, "error": "Payment not found"})
+                continue
+            provider = self.providers.get(payment.provider)
+            if provider:
+                verification = await provider.verify_payment(item)
+            else:
+                verification = {"success": False, "error": "Provider not found"}
+            verified = bool(verification.get("success") and verification.get("verified"))
+
+            values = updates.setdefault(payment.id, {"id": payment.id})
+            status = values.get("status", payment.status)
+            if status in VERIFIABLE_STATUSES:
+                status = "completed" if verified else "failed"
+                values.update(status=status, updated_at=now)
+                if verified:
+                    values["provider_payment_id"] = item["payment_id"]
+                    values["provider_data"] = {**payment.provider_data, **item} if payment.provider_data else item
+            results.append({
+                "order_id": item["order_id"],
+                "id": payment.id,
+                "status": status,
+                "verified": verified,
+                "error": verification.get("error"),
+            })
+
+        changed = [values for values in updates.values() if "status" in values]
+        if changed:
+            await self.payments.update_many(changed, {payment.id: payment for payment in loaded})
+            await self.db.commit()
+        return results
+
+    async def refund_payment(self, payment: Payment, amount: float, reason: str = None) -> Dict[str, Any]:
+        payment_id = payment.id
         if payment.status != "completed":
             return {"success": False, "error": "Payment not completed"}
 
@@ -98,30 +156,30 @@ class PaymentService:
         try:
             refund_result = await provider.refund_payment(payment.provider_payment_id, int(amount))
             if refund_result.get("success"):
-                await self.update_payment(payment_id, {"status": "refunded"})
-                return {"success": True, "refund_id": refund_result.get("refund_id")}
+                updated = await self.update_payment(payment, {"status": "refunded"})
+                return {"success": True, "refund_id": refund_result.get("refund_id"), "payment": updated}
             else:
                 return {"success": False, "error": refund_result.get("error")}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    async def get_payment(self, payment_id: int) -> Optional[Payment]:
-        return await self.db.get(Payment, payment_id)
+    async def get_payment(self, payment_id: int, for_update: bool = False) -> Optional[Payment]:
+        return await self.payments.get(payment_id, for_update=for_update)
 
     async def list_payments(self, user_id: int = None, skip: int = 0, limit: int = 100) -> List[Payment]:
-        query = select(Payment)
-        if user_id:
-            query = query.filter(Payment.user_id == user_id)
-        query = query.offset(skip).limit(limit)
-        result = await self.db.execute(query)
-        return result.scalars().all()
-
-    async def update_payment(self, payment_id: int, data: Dict[str, Any]) -> Payment:
-        payment = await self.get_payment(payment_id)
-        if payment:
-            for key, value in data.items():
-                setattr(payment, key, value)
-            payment.updated_at = datetime.utcnow()
-            await self.db.commit()
-            await self.db.refresh(payment)
-        return payment 
\ No newline at end of file
+        return await self.payments.list(user_id=user_id, skip=skip, limit=limit)
+
+    async def page_payments(
+        self, user_id: int = None, limit: int = 100,
+        after: Optional[str] = None, before: Optional[str] = None
+    ) -> Page[Payment]:
+        return await self.payments.page(user_id=user_id, limit=limit, after=after, before=before)
+
+    async def update_payment(self, payment: Payment, data: Dict[str, Any]) -> Optional[Row]:
+        """Applies `data` with a single UPDATE ... RETURNING and commits."""
+        updated = await self.payments.update(payment, **data, updated_at=datetime.utcnow())
+        await self.db.commit()
+        return updated
+
+    async def get_summary(self, user_id: int) -> List[PaymentSummary]:
+        return await self.payments.summary(user_id)
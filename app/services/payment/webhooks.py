@@ -0,0 +1,159 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.payment.providers.base import PaymentEvent
+from app.services.payment.repository import PaymentRepository
+
+# Status a webhook moves a payment to -> statuses it may move it from. Checking
+# the current (locked) status makes replays harmless, including across workers.
+# Batches are applied in this order, so a capture and a refund for the same
+# order in one batch end up refunded.
+ALLOWED_TRANSITIONS: Dict[str, Tuple[str, ...]] = {
+    "completed": ("pending", "failed"),
+    "failed": ("pending",),
+    "refunded": ("completed",),
+}
+
+
+class WebhookProcessor:
+    """
+    Buffers verified webhook events in a bounded queue and applies them from a
+    single background task, in batches, so a burst of webhooks costs one
+    SELECT ... FOR UPDATE and one executemany UPDATE instead of a transaction each.
+
+    When the queue is full, `submit` waits up to WEBHOOK_ENQUEUE_TIMEOUT_SECONDS
+    and then reports failure; the endpoint turns that into a 503 so the
+    provider retries later. Events are acknowledged once queued, so a batch
+    that fails to apply is logged rather than redelivered.
+    """
+
+    def __init__(self):
+        self.seen_events: TTLCache[bool] = TTLCache(
+            max_size=settings.WEBHOOK_QUEUE_MAX_SIZE * 10,
+            ttl_seconds=settings.WEBHOOK_DEDUP_TTL_SECONDS,
+        )
+        self._queue: Optional["asyncio.Queue[PaymentEvent]"] = None
+        self._task: Optional[asyncio.Task] = None
+        self.processed = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.failed_batches = 0
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=settings.WEBHOOK_QUEUE_MAX_SIZE)
+        self._task = asyncio.create_task(self._run(), name="payment-webhooks")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Applies what is still queued, then stops the consumer."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self._queue.qsize()} queued payment webhooks on shutdown.")
+        self._task.cancel()
+        self._task = None
+
+    async def submit(self, event: PaymentEvent) -> bool:
+        if self._queue is None:
+            return False
+        try:
+            await asyncio.wait_for(self._queue.put(event), settings.WEBHOOK_ENQUEUE_TIMEOUT_SECONDS)
+            return True
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._apply(batch)
+            except Exception:
+                self.failed_batches += 1
+                logger.exception(f"Failed to apply a batch of {len(batch)} payment webhooks.")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _next_batch(self) -> List[PaymentEvent]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.WEBHOOK_BATCH_WAIT_SECONDS
+        while len(batch) < settings.WEBHOOK_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _apply(self, batch: List[PaymentEvent]) -> None:
+        fresh: Dict[str, PaymentEvent] = {}
+        for event in batch:
+            if event.event_id in fresh or self.seen_events.get(event.event_id):
+                self.duplicates += 1
+                continue
+            fresh[event.event_id] = event
+
+        # Coalesce to one event per (provider, order) and target status; the latest wins.
+        by_status: Dict[str, Dict[Tuple[str, str], PaymentEvent]] = defaultdict(dict)
+        for event in fresh.values():
+            by_status[event.status][(event.provider, event.order_id)] = event
+
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            payments = PaymentRepository(db)
+            # Locked, so the transition checks and summary deltas see the current status.
+            loaded = await payments.find_by_orders(
+                list({event.order_id for event in fresh.values()}), for_update=True
+            )
+            by_order = {(payment.provider, payment.provider_order_id): payment for payment in loaded}
+            updates: Dict[int, Dict[str, object]] = {}
+            for status, from_statuses in ALLOWED_TRANSITIONS.items():
+                for key, event in by_status.get(status, {}).items():
+                    payment = by_order.get(key)
+                    if payment is None:
+                        continue
+                    values = updates.get(payment.id)
+                    current = values["status"] if values else payment.status
+                    if current not in from_statuses:
+                        continue
+                    values = updates.setdefault(payment.id, {"id": payment.id, "updated_at": now})
+                    values["status"] = status
+                    if event.payment_id:
+                        values["provider_payment_id"] = event.payment_id
+            if updates:
+                await payments.update_many(list(updates.values()), {payment.id: payment for payment in loaded})
+                await db.commit()
+
+        for event_id in fresh:
+            self.seen_events.set(event_id, True)
+        self.processed += len(fresh)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_queue_size": settings.WEBHOOK_QUEUE_MAX_SIZE,
+            "processed": self.processed,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "failed_batches": self.failed_batches,
+        }
+
+
+webhook_processor = WebhookProcessor()
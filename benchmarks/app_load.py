@@ -0,0 +1,318 @@
+"""
+Benchmark: in-process load and latency for the auth, RBAC and payment paths.
+
+Drives the ASGI app through httpx's ASGITransport, so the numbers cover the
+app, its middleware and the database but no network or server. For each
+scenario it reports p50/p95/p99 latency per step, requests per second and
+SQL statements per request (read from the `Server-Timing` header, so SQL
+instrumentation must be enabled), and writes them as JSON for comparing
+commits.
+
+Scenarios:
+- login: POST /auth/jwt/login
+- profiles_me: GET /profiles/me
+- guarded_{1,10,100}_roles: a permission-guarded endpoint for users holding
+  that many roles; the `_cold` variants clear the permission cache first
+- role_crud: create, read, update and delete a role (4 requests per step)
+- payment_flow: create a payment and verify it (2 requests per step), with
+  Razorpay against a local stub server or with the simulated provider
+
+By default it runs against a fresh SQLite file. `--database-url` points it at
+another database, e.g. a local Postgres; use a scratch database, its tables
+are dropped and recreated. Needs the app settings (.env) to import.
+
+Run from the project root:
+    python -m benchmarks.app_load --output app_load.json
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+ROLE_COUNTS = (1, 10, 100)
+WARMUP_STEPS = 5
+KEY_SECRET = "bench-secret"
+PASSWORD = "bench-password"
+
+
+@dataclass
+class ScenarioResult:
+    steps: int = 0
+    requests: int = 0
+    queries: int = 0
+    errors: int = 0
+    latencies: List[float] = field(default_factory=list)
+    wall_seconds: float = 0.0
+
+    def report(self, requests_per_step: int) -> Dict[str, object]:
+        if len(self.latencies) > 1:
+            cuts = statistics.quantiles(self.latencies, n=100, method="inclusive")
+            p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+        else:
+            p50 = p95 = p99 = self.latencies[0] if self.latencies else 0.0
+        return {
+            "steps": self.steps,
+            "requests": self.requests,
+            "requests_per_step": requests_per_step,
+            "errors": self.errors,
+            "p50_ms": round(p50 * 1000, 3),
+            "p95_ms": round(p95 * 1000, 3),
+            "p99_ms": round(p99 * 1000, 3),
+            "mean_ms": round(statistics.fmean(self.latencies) * 1000, 3) if self.latencies else 0.0,
+            "requests_per_second": round(self.requests / self.wall_seconds, 1) if self.wall_seconds else 0.0,
+            "queries_per_request": round(self.queries / self.requests, 2) if self.requests else 0.0,
+        }
+
+
+def _query_count(response: httpx.Response) -> int:
+    # e.g. 'db;dur=1.27;desc="2 queries"'
+    for metric in response.headers.get("server-timing", "").split(","):
+        if metric.strip().startswith("db;") and 'desc="' in metric:
+            return int(metric.split('desc="', 1)[1].split(" ", 1)[0])
+    return 0
+
+
+class Recorder:
+    """Wraps the client so every response of a step is counted and checked."""
+
+    def __init__(self, client: httpx.AsyncClient, result: ScenarioResult):
+        self.client = client
+        self.result = result
+
+    async def request(self, method: str, url: str, expect: int = 200, **kwargs) -> httpx.Response:
+        response = await self.client.request(method, url, **kwargs)
+        self.result.requests += 1
+        self.result.queries += _query_count(response)
+        if response.status_code != expect:
+            self.result.errors += 1
+        return response
+
+
+Step = Callable[[Recorder, int], Awaitable[None]]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, step: Step, steps: int, concurrency: int,
+    before_step: Optional[Callable[[], None]] = None,
+) -> ScenarioResult:
+    warmup = ScenarioResult()
+    for i in range(WARMUP_STEPS):
+        await step(Recorder(client, warmup), -1 - i)
+
+    result = ScenarioResult()
+    recorder = Recorder(client, result)
+    counter = iter(range(steps))
+
+    async def worker():
+        for i in counter:
+            if before_step:
+                before_step()
+            started = time.perf_counter()
+            await step(recorder, i)
+            result.latencies.append(time.perf_counter() - started)
+            result.steps += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.wall_seconds = time.perf_counter() - started
+    return result
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> Dict[str, str]:
+    response = await client.post("/api/v1/auth/jwt/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def setup_role_holders(client: httpx.AsyncClient, admin: Dict[str, str]) -> Dict[int, Dict[str, str]]:
+    """One user per entry of ROLE_COUNTS, holding that many roles; only the first grants reports:view."""
+    from app.core.permissions import AppPermissions
+
+    others = [p.value for p in AppPermissions if p != AppPermissions.REPORTS_VIEW]
+    roles_in = [
+        {"name": f"bench-role-{i}", "permissions": [AppPermissions.REPORTS_VIEW.value] if i == 0 else others[i % len(others):][:1]}
+        for i in range(max(ROLE_COUNTS))
+    ]
+    response = await client.post("/api/v1/rbac/roles/batch", json=roles_in, headers=admin)
+    response.raise_for_status()
+    role_ids = [role["id"] for role in response.json()]
+
+    users_in = [{"email": f"bench-{count}@example.com", "password": PASSWORD} for count in ROLE_COUNTS]
+    response = await client.post("/api/v1/profiles/batch", json=users_in, headers=admin)
+    response.raise_for_status()
+
+    holders = {}
+    for count, user in zip(ROLE_COUNTS, response.json()):
+        response = await client.post(
+            f"/api/v1/rbac/users/{user['id']}/roles/assign", json={"role_ids": role_ids[:count]}, headers=admin
+        )
+        response.raise_for_status()
+        holders[count] = await login(client, user["email"], PASSWORD)
+    return holders
+
+
+def build_scenarios(admin: Dict[str, str], holders: Dict[int, Dict[str, str]], admin_email: str, admin_password: str):
+    from app.core.cache import permission_cache
+
+    async def login_step(r: Recorder, i: int):
+        await r.request("POST", "/api/v1/auth/jwt/login", data={"username": admin_email, "password": admin_password})
+
+    async def profiles_me(r: Recorder, i: int):
+        await r.request("GET", "/api/v1/profiles/me", headers=admin)
+
+    def guarded(headers: Dict[str, str]) -> Step:
+        async def step(r: Recorder, i: int):
+            await r.request("GET", "/api/v1/admin/system-status", headers=headers)
+        return step
+
+    async def role_crud(r: Recorder, i: int):
+        response = await r.request(
+            "POST", "/api/v1/rbac/roles", expect=201,
+            json={"name": f"bench-crud-{i}", "permissions": ["users:read"]}, headers=admin,
+        )
+        if response.status_code != 201:
+            return
+        role_id = response.json()["id"]
+        await r.request("GET", f"/api/v1/rbac/roles/{role_id}", headers=admin)
+        await r.request("PATCH", f"/api/v1/rbac/roles/{role_id}", json={"permissions": ["reports:view"]}, headers=admin)
+        await r.request("DELETE", f"/api/v1/rbac/roles/{role_id}", expect=204, headers=admin)
+
+    async def payment_flow(r: Recorder, i: int):
+        response = await r.request("POST", "/api/v1/payments/", expect=201, json={"amount": 10.0}, headers=admin)
+        if response.status_code != 201:
+            return
+        payment = response.json()
+        order_id, payment_id = payment["provider_order_id"], f"pay_bench_{i}"
+        signature = hmac.new(KEY_SECRET.encode(), f"{order_id}|{payment_id}".encode(), hashlib.sha256).hexdigest()
+        await r.request(
+            "POST", f"/api/v1/payments/{payment['id']}/verify",
+            json={"order_id": order_id, "payment_id": payment_id, "signature": signature}, headers=admin,
+        )
+
+    scenarios = {
+        "login": (login_step, 1, None),
+        "profiles_me": (profiles_me, 1, None),
+    }
+    for count, headers in holders.items():
+        scenarios[f"guarded_{count}_roles"] = (guarded(headers), 1, None)
+        scenarios[f"guarded_{count}_roles_cold"] = (guarded(headers), 1, permission_cache.clear)
+    scenarios["role_crud"] = (role_crud, 4, None)
+    scenarios["payment_flow"] = (payment_flow, 2, None)
+    return scenarios
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace) -> None:
+    from app.core.config import settings
+
+    server = None
+    if args.provider == "razorpay":
+        from benchmarks import payment_provider
+
+        payment_provider.LATENCY_SECONDS = args.provider_latency
+        server = ThreadingHTTPServer(("127.0.0.1", 0), payment_provider.StubHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        settings.RAZORPAY_BASE_URL = f"http://127.0.0.1:{server.server_port}/v1"
+
+    from app.db.base import Base
+    from app.db.session import engine
+    from app.main import app
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    results = {}
+    # Server errors, e.g. from injected provider failures, count as errors instead of aborting.
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            admin = await login(client, settings.FIRST_SUPERUSER_EMAIL, settings.FIRST_SUPERUSER_PASSWORD)
+            holders = await setup_role_holders(client, admin)
+            scenarios = build_scenarios(
+                admin, holders, settings.FIRST_SUPERUSER_EMAIL, settings.FIRST_SUPERUSER_PASSWORD
+            )
+            print(f"{'scenario':<24} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'q/req':>6} {'errors':>6}")
+            for name, (step, requests_per_step, before_step) in scenarios.items():
+                if args.scenarios and name not in args.scenarios:
+                    continue
+                # Password hashing dominates login; fewer steps keep the run short.
+                steps = max(args.steps // 10, 20) if name == "login" else args.steps
+                result = await run_scenario(client, step, steps, args.concurrency, before_step)
+                report = results[name] = result.report(requests_per_step)
+                print(
+                    f"{name:<24} {report['p50_ms']:>8.2f} {report['p95_ms']:>8.2f} {report['p99_ms']:>8.2f} "
+                    f"{report['requests_per_second']:>8.1f} {report['queries_per_request']:>6.2f} {report['errors']:>6}"
+                )
+    await engine.dispose()
+    if server is not None:
+        server.shutdown()
+
+    output = {
+        "commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "steps": args.steps,
+        "concurrency": args.concurrency,
+        "provider": args.provider,
+        "provider_latency_seconds": args.provider_latency,
+        "scenarios": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Scratch database to use instead of a fresh SQLite file")
+    parser.add_argument("--steps", type=int, default=200, help="Measured steps per scenario (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients (default: 8)")
+    parser.add_argument(
+        "--provider", choices=("razorpay", "simulated"), default="razorpay",
+        help="Payment provider for payment_flow (default: razorpay, against a local stub server)",
+    )
+    parser.add_argument("--provider-latency", type=float, default=0.0, help="Provider delay in seconds")
+    parser.add_argument("--scenarios", nargs="*", help="Only run these scenarios")
+    parser.add_argument("--output", default="app_load.json", help="JSON results file (default: app_load.json)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    # Settings are read at import time, so the environment is prepared first.
+    os.environ["DATABASE_URL"] = arguments.database_url or (
+        f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='app_load-'), 'bench.db')}"
+    )
+    os.environ.setdefault("RAZORPAY_KEY_ID", "bench-key")
+    os.environ["RAZORPAY_KEY_SECRET"] = KEY_SECRET
+    if arguments.provider == "simulated":
+        # Error rates, jitter and the distribution come from the usual settings.
+        os.environ["DEFAULT_PAYMENT_PROVIDER"] = "simulated"
+        os.environ["SIMULATED_PROVIDER_SECRET"] = KEY_SECRET
+        os.environ["SIMULATED_PROVIDER_LATENCY_MS"] = str(arguments.provider_latency * 1000)
+    asyncio.run(main(arguments))
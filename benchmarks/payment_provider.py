@@ -0,0 +1,89 @@
+"""
+Benchmark: concurrent Razorpay order creation against a local stub server,
+comparing the old per-request blocking client with the pooled provider.
+
+The stub answers every request after a fixed delay, standing in for the
+provider's network round trip. Needs the app settings (.env) to import.
+
+Run from the project root:
+    python -m benchmarks.payment_provider
+"""
+import asyncio
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import razorpay
+
+from app.core.config import settings
+from app.services.payment.providers.razorpay import RazorpayProvider
+
+CONCURRENCY = (1, 10, 50)
+LATENCY_SECONDS = 0.05
+_order_ids = itertools.count(1)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        order = json.loads(body or b"{}")
+        time.sleep(LATENCY_SECONDS)
+        payload = json.dumps({
+            "id": f"order_{next(_order_ids)}",
+            "amount": order.get("amount"),
+            "currency": order.get("currency"),
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+async def blocking_order(base_url: str) -> None:
+    # What the service did before: a fresh client per request, called inline.
+    client = razorpay.Client(auth=("key", "secret"), base_url=base_url)
+    client.order.create({"amount": 100, "currency": "INR"})
+
+
+async def run(concurrency: int, make_call) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(make_call() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+
+    settings.RAZORPAY_BASE_URL = base_url
+    provider = RazorpayProvider()
+    await provider.start()
+
+    async def pooled_order():
+        result = await provider.create_order(amount=1, currency="INR")
+        assert result["success"], result
+
+    print(f"stub latency {LATENCY_SECONDS * 1000:.0f} ms, "
+          f"{settings.PAYMENT_PROVIDER_MAX_WORKERS} workers")
+    print(f"{'concurrent':>10} {'blocking (s)':>13} {'pooled (s)':>11} {'speedup':>8}")
+    try:
+        for concurrency in CONCURRENCY:
+            blocking = await run(concurrency, lambda: blocking_order(base_url))
+            pooled = await run(concurrency, pooled_order)
+            print(f"{concurrency:>10} {blocking:>13.3f} {pooled:>11.3f} {blocking / pooled:>7.1f}x")
+    finally:
+        await provider.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+"""
+Micro-benchmark: per-request permission check with string sets vs. bitmasks.
+
+Run from the project root:
+    python -m benchmarks.permission_check
+"""
+import random
+import timeit
+
+from app.core.permissions import AppPermissions, permission_bit, permissions_to_mask
+
+ROLE_COUNTS = (1, 10, 100)
+NUMBER = 20_000
+
+
+def _make_roles(count: int) -> list[list[str]]:
+    values = [p.value for p in AppPermissions]
+    rng = random.Random(count)
+    return [rng.sample(values, rng.randint(1, len(values))) for _ in range(count)]
+
+
+def main() -> None:
+    required = AppPermissions.PAYMENTS_CREATE.value
+    required_bit = permission_bit(required)
+    print(f"{'roles':>6} {'set (us/check)':>16} {'mask (us/check)':>17} {'speedup':>8}")
+    for count in ROLE_COUNTS:
+        role_permissions = _make_roles(count)
+        role_masks = [permissions_to_mask(p) for p in role_permissions]
+
+        def set_check():
+            user_permissions = {perm for permissions in role_permissions for perm in permissions}
+            return required in user_permissions
+
+        def mask_check():
+            mask = 0
+            for role_mask in role_masks:
+                mask |= role_mask
+            return mask & required_bit == required_bit
+
+        assert set_check() == mask_check()
+        set_time = min(timeit.repeat(set_check, number=NUMBER, repeat=5)) / NUMBER * 1e6
+        mask_time = min(timeit.repeat(mask_check, number=NUMBER, repeat=5)) / NUMBER * 1e6
+        print(f"{count:>6} {set_time:>16.3f} {mask_time:>17.3f} {set_time / mask_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+
+# Settings are read at import time, so the environment is prepared before any
+# app module is imported. Every test gets a fresh SQLite database and pays
+# through the simulated provider, with no latency.
+os.environ["DATABASE_URL"] = (
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='tests-'), 'test.db')}"
+)
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ["FIRST_SUPERUSER_EMAIL"] = "admin@example.com"
+os.environ["FIRST_SUPERUSER_PASSWORD"] = "admin-password"
+os.environ["DEFAULT_PAYMENT_PROVIDER"] = "simulated"
+os.environ["SIMULATED_PROVIDER_LATENCY_MS"] = "0"
+os.environ["SIMULATED_PROVIDER_SECRET"] = "test-provider-secret"
+
+import httpx
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client(anyio_backend):
+    from app.core.cache import auth_state_cache, permission_cache, response_cache
+    from app.db.base import Base
+    from app.db.session import _recent_writers, engine
+    from app.main import app
+    from app.services.payment.idempotency import payment_idempotency
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    # Ids restart with every database, so nothing cached may outlive a test.
+    permission_cache.clear()
+    auth_state_cache.clear()
+    response_cache.entries.clear()
+    payment_idempotency.cache.clear()
+    _recent_writers.clear()
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as test_client:
+            yield test_client
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> dict:
+    response = await client.post("/api/v1/auth/jwt/login", data={"username": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+async def admin_headers(client):
+    return await login(client, os.environ["FIRST_SUPERUSER_EMAIL"], os.environ["FIRST_SUPERUSER_PASSWORD"])
+
+
+@pytest.fixture(params=["native", "portable"])
+def dialect(request, monkeypatch):
+    """Runs a test as is, and again through the fallbacks used by dialects without conflict clauses."""
+    from app.db.session import engine
+
+    if request.param == "portable":
+        monkeypatch.setattr(engine.sync_engine.dialect, "name", "generic")
+        monkeypatch.setattr(engine.sync_engine.dialect, "delete_returning", False)
+    return request.param
+
+
+def query_count(response: httpx.Response) -> int:
+    """SQL statements the request ran, from the `Server-Timing` header of QueryStatsMiddleware."""
+    for metric in response.headers.get("server-timing", "").split(","):
+        if metric.strip().startswith("db;") and 'desc="' in metric:
+            return int(metric.split('desc="', 1)[1].split(" ", 1)[0])
+    return 0
@@ -0,0 +1,82 @@
+import pytest
+from fastapi_users.jwt import generate_jwt
+from sqlalchemy import select
+
+from app.auth.auth import get_jwt_strategy, read_token_claims
+from app.core.config import settings
+from app.core.permissions import AppPermissions, mask_to_permissions
+from app.db.initial_data import SUPER_ADMIN_ROLE
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from tests.conftest import login, query_count
+from tests.test_rbac import create_role, create_users
+
+pytestmark = pytest.mark.anyio
+
+ADMIN_ROLES = [SUPER_ADMIN_ROLE]
+
+
+async def test_login_does_not_load_roles(client):
+    response = await client.post(
+        "/api/v1/auth/jwt/login", data={"username": settings.FIRST_SUPERUSER_EMAIL, "password": settings.FIRST_SUPERUSER_PASSWORD}
+    )
+    assert response.status_code == 200
+    assert query_count(response) == 1
+
+
+@pytest.mark.parametrize("url", ["/api/v1/profiles/me", "/api/v1/users/me"])
+async def test_user_responses_embed_roles(client, admin_headers, url):
+    response = await client.get(url, headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert [role["name"] for role in response.json()["roles"]] == ADMIN_ROLES
+    assert query_count(response) == 2  # the user, then its roles
+
+
+async def test_updated_user_embeds_roles(client, admin_headers):
+    response = await client.patch("/api/v1/profiles/me", json={"is_verified": True}, headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert [role["name"] for role in response.json()["roles"]] == ADMIN_ROLES
+
+
+async def test_permission_claims_are_signed_without_loading_roles(client, monkeypatch):
+    monkeypatch.setattr(settings, "JWT_PERMISSION_CLAIMS", True)
+    headers = await login(client, settings.FIRST_SUPERUSER_EMAIL, settings.FIRST_SUPERUSER_PASSWORD)
+    claims = read_token_claims(headers["Authorization"].removeprefix("Bearer "))
+    assert mask_to_permissions(claims["pm"]) == {permission.value for permission in AppPermissions}
+    async with AsyncSessionLocal() as db:
+        admin = (await db.execute(select(User).where(User.email == settings.FIRST_SUPERUSER_EMAIL))).scalar_one()
+    assert claims["rv"] == admin.role_version
+
+    response = await client.get("/api/v1/admin/system-status", headers=headers)
+    assert response.status_code == 200, response.text
+    assert query_count(response) == 1  # the user's authentication columns, then cached
+    response = await client.get("/api/v1/admin/system-status", headers=headers)
+    assert response.status_code == 200, response.text
+    assert query_count(response) == 0
+
+
+async def test_permission_claims_are_rechecked_after_a_grant_change(client, admin_headers, monkeypatch):
+    monkeypatch.setattr(settings, "JWT_PERMISSION_CLAIMS", True)
+    role_id = await create_role(client, admin_headers, "Reporter", permissions=("reports:view",))
+    (user_id,) = await create_users(client, admin_headers, 1)
+    response = await client.post(f"/api/v1/rbac/users/{user_id}/roles/{role_id}", headers=admin_headers)
+    assert response.status_code == 200, response.text
+    headers = await login(client, "user0@example.com", "password")
+    response = await client.get("/api/v1/admin/system-status", headers=headers)
+    assert response.status_code == 200
+
+    response = await client.post(
+        f"/api/v1/rbac/users/{user_id}/roles/revoke", json={"role_ids": [role_id]}, headers=admin_headers
+    )
+    assert response.json() == {"count": 1}
+    response = await client.get("/api/v1/admin/system-status", headers=headers)
+    assert response.status_code == 403
+
+
+async def test_token_with_a_non_string_subject_is_rejected(client):
+    strategy = get_jwt_strategy()
+    token = generate_jwt(
+        {"sub": None, "aud": strategy.token_audience}, strategy.encode_key, 60, algorithm=strategy.algorithm
+    )
+    response = await client.get("/api/v1/admin/system-status", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
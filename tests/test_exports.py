@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+async def test_payment_export_converts_offset_bounds_to_utc(client, admin_headers):
+    response = await client.post("/api/v1/payments/", json={"amount": 10.0}, headers=admin_headers)
+    assert response.status_code == 201, response.text
+    # A minute before the payment, written in a zone ahead of UTC.
+    before = (datetime.now(timezone.utc) - timedelta(minutes=1)).astimezone(IST).isoformat()
+
+    async def export(**params):
+        response = await client.get("/api/v1/admin/exports/payments", params=params, headers=admin_headers)
+        assert response.status_code == 200, response.text
+        return response.text.splitlines()
+
+    assert len(await export(created_from=before)) == 1
+    assert await export(created_to=before) == []
@@ -0,0 +1,27 @@
+import pytest
+
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_metrics_require_the_configured_token(client, monkeypatch):
+    response = await client.get("/metrics")
+    assert response.status_code == 404
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-token")
+    for headers in ({}, {"Authorization": "Bearer wrong"}, {"Authorization": "Bearer é".encode()}):
+        response = await client.get("/metrics", headers=headers)
+        assert response.status_code == 401
+    response = await client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+    assert response.status_code == 200
+    assert "http_requests_total" in response.text
+
+
+async def test_unknown_methods_share_one_label(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-token")
+    await client.request("BREW", "/api/v1/payments/")
+
+    response = await client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+    assert 'method="BREW"' not in response.text
+    assert 'method="OTHER"' in response.text
@@ -0,0 +1,39 @@
+import pytest
+
+from app.crud.pagination import encode_cursor
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("values", [
+    [{"a": 1}],
+    ["1"],
+    [True],
+    [2**64],
+    [None],
+    [1, 2],
+])
+async def test_malformed_id_cursor_is_rejected(client, admin_headers, values):
+    response = await client.get(f"/api/v1/rbac/roles?after={encode_cursor(values)}", headers=admin_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.parametrize("values", [
+    [1, 1],
+    ["not a date", 1],
+    ["2024-01-01T00:00:00+00:00", 1],
+    ["2024-01-01T00:00:00", [1]],
+])
+async def test_malformed_keyset_cursor_is_rejected(client, admin_headers, values):
+    response = await client.get(f"/api/v1/payments/?before={encode_cursor(values)}", headers=admin_headers)
+    assert response.status_code == 400
+
+
+async def test_valid_cursor_pages(client, admin_headers):
+    for i in range(3):
+        await client.post("/api/v1/rbac/roles", json={"name": f"Role {i}", "permissions": []}, headers=admin_headers)
+    first = await client.get("/api/v1/rbac/roles?limit=2", headers=admin_headers)
+    second = await client.get(f"/api/v1/rbac/roles?limit=2&after={first.headers['x-next-cursor']}", headers=admin_headers)
+    assert second.status_code == 200
+    assert len(first.json()) + len(second.json()) == 4
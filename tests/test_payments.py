@@ -0,0 +1,123 @@
+import pytest
+
+from app.services.payment.providers.registry import payment_providers
+from tests.conftest import query_count
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_payment(client, headers, amount=10.0):
+    response = await client.post("/api/v1/payments/", json={"amount": amount}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def verification(order_id, payment_id="pay_test"):
+    signature = payment_providers.get("simulated").sign(order_id, payment_id)
+    return {"order_id": order_id, "payment_id": payment_id, "signature": signature}
+
+
+async def test_verify_batch_counts_a_repeated_order_once(client, admin_headers):
+    payment = await create_payment(client, admin_headers)
+    item = verification(payment["provider_order_id"])
+
+    response = await client.post("/api/v1/payments/verify-batch", json=[item, item], headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert [result["status"] for result in response.json()] == ["completed", "completed"]
+
+    response = await client.get("/api/v1/payments/summary", headers=admin_headers)
+    assert response.json()["totals"] == [
+        {"status": "completed", "currency": "INR", "count": 1, "total_amount": 10.0}
+    ]
+
+
+async def test_verify_batch_retries_a_failed_item_of_the_same_order(client, admin_headers):
+    payment = await create_payment(client, admin_headers)
+    valid = verification(payment["provider_order_id"])
+    invalid = {**valid, "signature": "0" * 64}
+
+    response = await client.post("/api/v1/payments/verify-batch", json=[invalid, valid], headers=admin_headers)
+    assert [result["status"] for result in response.json()] == ["failed", "completed"]
+
+    response = await client.get("/api/v1/payments/summary", headers=admin_headers)
+    assert response.json()["totals"] == [
+        {"status": "completed", "currency": "INR", "count": 1, "total_amount": 10.0}
+    ]
+
+
+async def test_payment_endpoints_statement_counts(client, admin_headers):
+    # Authentication is one statement; a status write adds one summary upsert.
+    response = await client.post("/api/v1/payments/", json={"amount": 10.0}, headers=admin_headers)
+    assert response.status_code == 201
+    assert query_count(response) == 3  # auth, INSERT ... RETURNING, summary upsert
+    payment = response.json()
+
+    response = await client.post(
+        f"/api/v1/payments/{payment['id']}/verify", json=verification(payment["provider_order_id"]), headers=admin_headers
+    )
+    assert response.status_code == 200
+    assert query_count(response) == 4  # auth, SELECT ... FOR UPDATE, UPDATE ... RETURNING, summary upsert
+
+    other = await create_payment(client, admin_headers)
+    response = await client.post(
+        "/api/v1/payments/verify-batch", json=[verification(other["provider_order_id"])], headers=admin_headers
+    )
+    assert response.status_code == 200
+    assert query_count(response) == 4  # auth, SELECT ... FOR UPDATE, executemany UPDATE, summary upsert
+
+    for url in (
+        "/api/v1/payments/",
+        "/api/v1/payments/?skip=1",
+        "/api/v1/payments/summary",
+        f"/api/v1/payments/{payment['id']}",
+    ):
+        response = await client.get(url, headers=admin_headers)
+        assert response.status_code == 200
+        assert query_count(response) == 2, url  # auth, one SELECT
+
+
+async def test_webhook_with_a_non_ascii_signature_is_rejected(client):
+    response = await client.post(
+        "/api/v1/payments/webhooks/simulated",
+        content=b'{"event": "payment.captured"}',
+        headers={"X-Simulated-Signature": "é".encode()},
+    )
+    assert response.status_code == 400
+
+
+async def test_idempotent_create_commits_the_payment_with_the_stored_response(client, admin_headers, monkeypatch):
+    from app.services.payment.idempotency import payment_idempotency
+
+    async def fail_to_store(*args, **kwargs):
+        raise RuntimeError("lost the connection")
+
+    headers = {**admin_headers, "Idempotency-Key": "retry-me"}
+    with monkeypatch.context() as patch:
+        patch.setattr(payment_idempotency, "_store", fail_to_store)
+        with pytest.raises(RuntimeError):
+            await client.post("/api/v1/payments/", json={"amount": 10.0}, headers=headers)
+
+    response = await client.get("/api/v1/payments/", headers=admin_headers)
+    assert response.json() == []
+
+    first = await client.post("/api/v1/payments/", json={"amount": 10.0}, headers=headers)
+    again = await client.post("/api/v1/payments/", json={"amount": 10.0}, headers=headers)
+    assert first.status_code == again.status_code == 201
+    assert first.json() == again.json()
+    response = await client.get("/api/v1/payments/", headers=admin_headers)
+    assert [payment["id"] for payment in response.json()] == [first.json()["id"]]
+
+
+async def test_summary_totals_follow_status_changes(client, admin_headers, dialect):
+    first = await create_payment(client, admin_headers, amount=10.0)
+    await create_payment(client, admin_headers, amount=5.0)
+    response = await client.post(
+        "/api/v1/payments/verify-batch", json=[verification(first["provider_order_id"])], headers=admin_headers
+    )
+    assert response.status_code == 200, response.text
+
+    response = await client.get("/api/v1/payments/summary", headers=admin_headers)
+    assert response.json()["totals"] == [
+        {"status": "completed", "currency": "INR", "count": 1, "total_amount": 10.0},
+        {"status": "pending", "currency": "INR", "count": 1, "total_amount": 5.0},
+    ]
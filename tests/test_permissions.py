@@ -0,0 +1,20 @@
+import pytest
+
+from app.core.permissions import PERMISSION_BITS, AppPermissions, check_permission_bits
+
+
+def test_every_permission_has_its_own_bit():
+    check_permission_bits(PERMISSION_BITS)
+
+
+@pytest.mark.parametrize(
+    "bits, error",
+    [
+        ({p: bit for p, bit in PERMISSION_BITS.items() if p != AppPermissions.PAYMENTS_CREATE}, "without a bit"),
+        ({**PERMISSION_BITS, AppPermissions.PAYMENTS_CREATE: 0}, "unique"),
+        ({**PERMISSION_BITS, AppPermissions.PAYMENTS_CREATE: 63}, r"\[0, 63\)"),
+    ],
+)
+def test_an_incomplete_bit_table_is_rejected(bits, error):
+    with pytest.raises(ValueError, match=error):
+        check_permission_bits(bits)
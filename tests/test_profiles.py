@@ -0,0 +1,48 @@
+import pytest
+from sqlalchemy import select, update
+
+from app.db.session import AsyncSessionLocal
+from app.models.user import User
+from tests.conftest import login
+from tests.test_rbac import create_role, create_users
+
+pytestmark = pytest.mark.anyio
+
+
+async def superusers():
+    async with AsyncSessionLocal() as db:
+        return set((await db.execute(select(User.email).where(User.is_superuser))).scalars())
+
+
+async def test_users_manage_cannot_grant_superuser(client, admin_headers):
+    role_id = await create_role(client, admin_headers, "User manager", permissions=("users:manage",))
+    manager_id, other_id = await create_users(client, admin_headers, 2)
+    response = await client.post(f"/api/v1/rbac/users/{manager_id}/roles/{role_id}", headers=admin_headers)
+    assert response.status_code == 200, response.text
+    headers = await login(client, "user0@example.com", "password")
+
+    for batch in (
+        [{"email": "root@example.com", "password": "password", "is_superuser": True}],
+        [{"email": "root@example.com", "password": "password", "is_verified": True}],
+    ):
+        response = await client.post("/api/v1/profiles/batch", json=batch, headers=headers)
+        assert response.status_code == 422
+    for batch in ([{"id": manager_id, "is_superuser": True}], [{"id": other_id, "is_verified": True}]):
+        response = await client.patch("/api/v1/profiles/batch", json=batch, headers=headers)
+        assert response.status_code == 422
+    assert await superusers() == set()
+
+    # Nor take over an existing superuser by changing their credentials.
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(User).where(User.id == other_id).values(is_superuser=True))
+        await db.commit()
+    response = await client.patch(
+        "/api/v1/profiles/batch", json=[{"id": other_id, "password": "taken-over"}], headers=headers
+    )
+    assert response.status_code == 403
+    await login(client, "user1@example.com", "password")
+
+    response = await client.patch(
+        "/api/v1/profiles/batch", json=[{"id": manager_id, "is_active": True}], headers=headers
+    )
+    assert response.json() == {"count": 1}
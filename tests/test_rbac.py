@@ -0,0 +1,104 @@
+import pytest
+from sqlalchemy import insert, select, update
+
+from app.db.session import AsyncSessionLocal
+from app.models.rbac import role_permissions, user_role_association
+from app.models.user import User
+from tests.conftest import login
+
+pytestmark = pytest.mark.anyio
+
+
+async def assignments():
+    async with AsyncSessionLocal() as db:
+        return set((await db.execute(select(user_role_association.c.user_id, user_role_association.c.role_id))).all())
+
+
+async def create_role(client, headers, name, permissions=("users:read",)):
+    response = await client.post("/api/v1/rbac/roles", json={"name": name, "permissions": list(permissions)}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def create_users(client, headers, count):
+    users_in = [{"email": f"user{i}@example.com", "password": "password"} for i in range(count)]
+    response = await client.post("/api/v1/profiles/batch", json=users_in, headers=headers)
+    assert response.status_code == 201, response.text
+    return [user["id"] for user in response.json()]
+
+
+async def test_deleting_an_assigned_role_removes_its_assignments(client, admin_headers):
+    role_id = await create_role(client, admin_headers, "Reader")
+    (user_id,) = await create_users(client, admin_headers, 1)
+    response = await client.post(f"/api/v1/rbac/users/{user_id}/roles/{role_id}", headers=admin_headers)
+    assert response.status_code == 200, response.text
+
+    response = await client.delete(f"/api/v1/rbac/roles/{role_id}", headers=admin_headers)
+    assert response.status_code == 204
+    assert (user_id, role_id) not in await assignments()
+
+
+async def test_bulk_deletes_remove_assignments(client, admin_headers):
+    role_ids = [await create_role(client, admin_headers, f"Role {i}") for i in range(2)]
+    user_ids = await create_users(client, admin_headers, 2)
+    for user_id in user_ids:
+        response = await client.post(
+            f"/api/v1/rbac/users/{user_id}/roles/assign", json={"role_ids": role_ids}, headers=admin_headers
+        )
+        assert response.status_code == 200, response.text
+
+    response = await client.post("/api/v1/rbac/roles/batch/delete", json={"ids": role_ids[:1]}, headers=admin_headers)
+    assert response.json() == {"count": 1}
+    response = await client.post("/api/v1/profiles/batch/delete", json={"ids": user_ids[:1]}, headers=admin_headers)
+    assert response.json() == {"count": 1}
+
+    assert {(user_id, role_id) for user_id, role_id in await assignments() if user_id != 1} == {
+        (user_ids[1], role_ids[1])
+    }
+    async with AsyncSessionLocal() as db:
+        remaining = (await db.execute(select(role_permissions.c.role_id))).scalars().all()
+    assert role_ids[0] not in remaining
+
+
+async def test_grant_change_from_another_worker_is_seen_before_the_cache_expires(client, admin_headers):
+    role_id = await create_role(client, admin_headers, "Reporter", permissions=("reports:view",))
+    (user_id,) = await create_users(client, admin_headers, 1)
+    headers = await login(client, "user0@example.com", "password")
+    response = await client.get("/api/v1/admin/system-status", headers=headers)
+    assert response.status_code == 403  # Cached: no permissions
+
+    # What another worker's assignment does; it cannot invalidate this process's cache.
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(user_role_association).values(user_id=user_id, role_id=role_id))
+        await db.execute(update(User).where(User.id == user_id).values(role_version=User.role_version + 1))
+        await db.commit()
+
+    response = await client.get("/api/v1/admin/system-status", headers=headers)
+    assert response.status_code == 200
+
+
+async def role_versions(user_ids):
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(select(User.id, User.role_version).where(User.id.in_(user_ids)))
+        return dict(rows.all())
+
+
+async def test_bulk_assignments_bump_only_the_users_that_changed(client, admin_headers, dialect):
+    role_id = await create_role(client, admin_headers, "Reader")
+    assigned, other = await create_users(client, admin_headers, 2)
+    url = f"/api/v1/rbac/roles/{role_id}/users"
+
+    response = await client.post(f"{url}/assign", json={"user_ids": [assigned, assigned, 999]}, headers=admin_headers)
+    assert response.json() == {"count": 1}
+    response = await client.post(f"{url}/assign", json={"user_ids": [assigned, other]}, headers=admin_headers)
+    assert response.json() == {"count": 1}
+    assert await role_versions([assigned, other]) == {assigned: 1, other: 1}
+
+    response = await client.post(
+        f"/api/v1/rbac/users/{assigned}/roles/revoke", json={"role_ids": [role_id, 999]}, headers=admin_headers
+    )
+    assert response.json() == {"count": 1}
+    response = await client.post(f"{url}/revoke", json={"user_ids": [assigned, other]}, headers=admin_headers)
+    assert response.json() == {"count": 1}
+    assert await role_versions([assigned, other]) == {assigned: 2, other: 2}
+    assert {(user_id, role_id) for user_id, role_id in await assignments() if user_id != 1} == set()
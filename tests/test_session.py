@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.db.session import ReadReplicas, read_replicas
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_reads_after_a_write_stay_on_the_primary_for_any_token_of_the_user(client, admin_headers, monkeypatch):
+    replica_reads = []
+
+    async def replica_session():
+        replica_reads.append(True)
+        return None  # No replica available: served by the primary.
+
+    monkeypatch.setattr(read_replicas, "session", replica_session)
+    # The same token, under a header spelled differently.
+    other_headers = {"Authorization": admin_headers["Authorization"].replace("Bearer", "bearer", 1)}
+
+    response = await client.get("/api/v1/payments/", headers=other_headers)
+    assert response.status_code == 200
+    assert len(replica_reads) == 1
+
+    response = await client.post("/api/v1/payments/", json={"amount": 10.0}, headers=admin_headers)
+    assert response.status_code == 201
+    response = await client.get("/api/v1/payments/", headers=other_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert len(replica_reads) == 1
+
+    response = await client.get("/api/v1/payments/", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+
+
+async def test_writes_through_the_users_routes_count_as_the_users_writes(client, admin_headers, monkeypatch):
+    replica_reads = []
+
+    async def replica_session():
+        replica_reads.append(True)
+        return None
+
+    monkeypatch.setattr(read_replicas, "session", replica_session)
+
+    response = await client.patch("/api/v1/profiles/me", json={"email": "admin2@example.com"}, headers=admin_headers)
+    assert response.status_code == 200
+    response = await client.get("/api/v1/payments/", headers=admin_headers)
+    assert response.status_code == 200
+    assert replica_reads == []
+
+
+async def test_replica_with_an_exhausted_pool_is_skipped_but_not_marked_down():
+    class ExhaustedSession:
+        async def connection(self):
+            raise PoolTimeoutError("QueuePool limit reached")
+
+        async def close(self):
+            pass
+
+    replicas = ReadReplicas(["sqlite+aiosqlite://"])
+    replica = replicas.replicas[0]
+    replica.sessionmaker = ExhaustedSession
+
+    assert await replicas.session() is None
+    assert replica.down_until == 0
+    await replicas.dispose()